@@ -9,11 +9,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from typing import Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
 from src.storage.factory import get_store, get_faiss_store
-from src.storage.faiss_store import FAISSStore
+from src.storage.faiss_store import FAISSStore, configure_faiss_threads
 from src import embeddings, config
 from src.schema import SearchResponse, SearchResult
 
@@ -48,6 +49,17 @@ class SearchResponseAPI(BaseModel):
     results: list[SearchResultAPI]
 
 
+class SearchBatchRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1, max_length=32, description="Consultas jurídicas (1-32)")
+    k: int = Field(5, ge=1, le=20, description="Número de resultados por consulta (1-20)")
+
+
+class SearchBatchResponseAPI(BaseModel):
+    total: int
+    backend: str
+    responses: list[SearchResponseAPI]
+
+
 # App FastAPI
 app = FastAPI(
     title="RAG Jurídico API",
@@ -80,6 +92,10 @@ async def startup_event():
     print(f"🤖 Modelo Embedding: {config.EMBEDDING_MODEL}")
     
     try:
+        # Threads OpenMP do FAISS (configuração global, uma vez por processo)
+        if config.SEARCH_BACKEND == "faiss":
+            print(f"🧵 Threads FAISS: {configure_faiss_threads()}")
+        
         # Inicializa store vetorial
         store = get_store()
         doc_count = store.get_doc_count()
@@ -125,6 +141,7 @@ async def root():
         "rag_service_available": rag_available,
         "endpoints": {
             "search": "/search (busca vetorial simples)",
+            "search_batch": "/search_batch (busca vetorial em lote)",
             "rag_query": "/api/rag/query (RAG completo para execução penal)",
             "health": "/health",
             "docs": "/docs"
@@ -171,41 +188,94 @@ async def search_documents(request: SearchRequest):
         )
     
     try:
-        # Gera embedding da query
-        query_vector = embeddings.encode_single_text(request.q)
+        # Encode + busca rodam no threadpool para não bloquear o event loop
+        # (requisições concorrentes se sobrepõem)
+        results = await run_in_threadpool(_search_sync, request.q, request.k)
         
-        # Busca documentos usando store global
-        results = store.search(query_vector, k=request.k)
-
-        # Converte para modelo API
-        api_results = []
-        for result in results:
-            doc = result.doc
-            api_result = SearchResultAPI(
-                id=doc.id,
-                title=doc.title,
-                text=doc.text,
-                court=doc.court,
-                code=doc.code,
-                article=doc.article,
-                date=doc.date,
-                meta=doc.meta,
-                score=result.score
-            )
-            api_results.append(api_result)
+        return _to_search_response(request.q, results)
         
-        return SearchResponseAPI(
-            query=request.q,
-            total=len(api_results),
+    except Exception as e:
+        print(f"❌ Erro na busca: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+
+@app.post("/search_batch", response_model=SearchBatchResponseAPI)
+async def search_documents_batch(request: SearchBatchRequest):
+    """
+    Busca várias consultas em lote (um único encode e uma única busca vetorial).
+    
+    - **queries**: Lista de consultas em linguagem natural (1-32)
+    - **k**: Número de resultados por consulta (1-20)
+    """
+    if store is None:
+        raise HTTPException(status_code=503, detail="Store não inicializado")
+    
+    if any(not q or not q.strip() for q in request.queries):
+        raise HTTPException(status_code=422, detail="Queries não podem ser vazias")
+    
+    doc_count = store.get_doc_count()
+    if doc_count == 0:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Nenhum documento indexado. Execute pipeline de build para {config.SEARCH_BACKEND}"
+        )
+    
+    try:
+        batch_results = await run_in_threadpool(_search_batch_sync, request.queries, request.k)
+        
+        responses = [
+            _to_search_response(query, results)
+            for query, results in zip(request.queries, batch_results)
+        ]
+        return SearchBatchResponseAPI(
+            total=len(responses),
             backend=config.SEARCH_BACKEND,
-            results=api_results
+            responses=responses
         )
         
     except Exception as e:
-        print(f"❌ Erro na busca: {e}")
+        print(f"❌ Erro na busca em lote: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
 
+def _search_sync(query: str, k: int) -> list[SearchResult]:
+    """Gera embedding da query e busca no store global (bloqueante)."""
+    query_vector = embeddings.encode_single_text(query)
+    return store.search(query_vector, k=k)
+
+
+def _search_batch_sync(queries: list[str], k: int) -> list[list[SearchResult]]:
+    """Gera embeddings de todas as queries em um único forward pass e busca em lote (bloqueante)."""
+    query_vectors = embeddings.encode_texts(queries)
+    return store.search_batch(query_vectors, k=k)
+
+
+def _to_search_response(query: str, results: list[SearchResult]) -> SearchResponseAPI:
+    """Converte resultados do store para o modelo da API."""
+    api_results = []
+    for result in results:
+        doc = result.doc
+        api_result = SearchResultAPI(
+            id=doc.id,
+            title=doc.title,
+            text=doc.text,
+            court=doc.court,
+            code=doc.code,
+            article=doc.article,
+            date=doc.date,
+            meta=doc.meta,
+            score=result.score
+        )
+        api_results.append(api_result)
+    
+    return SearchResponseAPI(
+        query=query,
+        total=len(api_results),
+        backend=config.SEARCH_BACKEND,
+        results=api_results
+    )
+
+
 @app.post("/api/rag/query", response_model=RagQueryResponse)
 async def rag_query(request: RagQueryRequest):
     """
@@ -8,6 +8,10 @@ import tiktoken
 
 from src.rag_schemas import ChunkingConfig, DocumentoParaChunking
 
+_RE_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+_RE_MULTI_NEWLINE = re.compile(r'\n{3,}')
+_RE_MULTI_SPACE = re.compile(r' +')
+
 
 class DocumentChunker:
     """
@@ -67,9 +71,12 @@ class DocumentChunker:
         # Quebra em chunks
         chunks = self._split_into_chunks(texto)
         
+        # Conta tokens de todos os chunks de uma vez (tiktoken paraleliza o lote)
+        tokens_por_chunk = self._count_tokens_batch(chunks)
+        
         # Monta resultado com metadados
         resultado = []
-        for i, chunk_texto in enumerate(chunks):
+        for i, (chunk_texto, tokens_chunk) in enumerate(zip(chunks, tokens_por_chunk)):
             chunk_dict = {
                 "idDocumentoGlobal": documento.id,
                 "idChunk": f"{documento.id}_chunk_{i}",
@@ -78,7 +85,7 @@ class DocumentChunker:
                     **documento.metadata,
                     "posicaoChunk": i,
                     "totalChunks": len(chunks),
-                    "tokensChunk": self._count_tokens(chunk_texto)
+                    "tokensChunk": tokens_chunk
                 }
             }
             resultado.append(chunk_dict)
@@ -91,13 +98,18 @@ class DocumentChunker:
         """
         chunks = []
         inicio = 0
+        tamanho_texto = len(texto)
         
-        while inicio < len(texto):
+        # Tamanhos em caracteres são constantes para todo o documento
+        alvo_chars = self._estimate_chars_for_tokens(self.config.tamanho_alvo)
+        overlap_chars = self._estimate_chars_for_tokens(self.config.overlap)
+        
+        while inicio < tamanho_texto:
             # Define fim do chunk
-            fim = inicio + self._estimate_chars_for_tokens(self.config.tamanho_alvo)
+            fim = inicio + alvo_chars
             
             # Se é o último pedaço, pega até o fim
-            if fim >= len(texto):
+            if fim >= tamanho_texto:
                 chunk = texto[inicio:].strip()
                 if chunk:
                     chunks.append(chunk)
@@ -117,7 +129,6 @@ class DocumentChunker:
                 chunks.append(chunk)
             
             # Calcula próximo início com overlap
-            overlap_chars = self._estimate_chars_for_tokens(self.config.overlap)
             inicio = max(inicio + 1, ponto_quebra - overlap_chars)
         
         return chunks
@@ -139,24 +150,22 @@ class DocumentChunker:
         
         # Tenta cada separador na ordem de preferência
         for separador in separadores:
-            # Busca última ocorrência do separador na janela
-            ultimas_ocorrencias = []
-            pos = busca_inicio
+            # Só as ocorrências vizinhas ao fim ideal importam:
+            # a última até fim_ideal e a primeira depois dele
+            antes = texto.rfind(
+                separador, busca_inicio, min(busca_fim, fim_ideal + len(separador))
+            )
+            depois = texto.find(separador, fim_ideal + 1, busca_fim)
             
-            while pos < busca_fim:
-                idx = texto.find(separador, pos, busca_fim)
-                if idx == -1:
-                    break
-                ultimas_ocorrencias.append(idx)
-                pos = idx + len(separador)
+            if antes == -1 and depois == -1:
+                continue
             
-            if ultimas_ocorrencias:
-                # Retorna posição mais próxima do fim ideal
-                melhor = min(
-                    ultimas_ocorrencias,
-                    key=lambda x: abs(x - fim_ideal)
-                )
-                return melhor + len(separador)
+            # Retorna posição mais próxima do fim ideal (empate favorece a anterior)
+            if depois == -1 or (antes != -1 and fim_ideal - antes <= depois - fim_ideal):
+                melhor = antes
+            else:
+                melhor = depois
+            return melhor + len(separador)
         
         # Fallback: corta no fim ideal
         return min(fim_ideal, len(texto))
@@ -169,6 +178,13 @@ class DocumentChunker:
             # Estimativa: ~4 chars por token (média para português)
             return len(texto) // 4
     
+    def _count_tokens_batch(self, textos: List[str]) -> List[int]:
+        """Conta tokens de vários textos em uma única chamada ao tokenizador."""
+        if self.encoding:
+            return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(textos)]
+        else:
+            return [len(texto) // 4 for texto in textos]
+    
     def _estimate_chars_for_tokens(self, num_tokens: int) -> int:
         """Estima número de caracteres para N tokens."""
         # Usa média de 4 chars por token
@@ -212,14 +228,14 @@ def preprocessar_texto_juridico(texto: str) -> str:
     - Remove caracteres de controle
     """
     # Remove caracteres de controle
-    texto = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', texto)
+    texto = _RE_CONTROL_CHARS.sub('', texto)
     
     # Normaliza quebras de linha
-    texto = re.sub(r'\r\n', '\n', texto)
-    texto = re.sub(r'\n{3,}', '\n\n', texto)
+    texto = texto.replace('\r\n', '\n')
+    texto = _RE_MULTI_NEWLINE.sub('\n\n', texto)
     
     # Remove múltiplos espaços
-    texto = re.sub(r' +', ' ', texto)
+    texto = _RE_MULTI_SPACE.sub(' ', texto)
     
     # Remove espaços no início/fim de linhas
     linhas = [linha.strip() for linha in texto.split('\n')]
@@ -16,10 +16,27 @@ SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "faiss")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
 NORMALIZE_EMBEDDINGS = os.getenv("NORMALIZE_EMBEDDINGS", "true").lower() == "true"
+# Textos por forward pass do modelo (batch interno do model.encode)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Quantização do modelo de embedding em CPU ("int8" ou vazio para float32)
+EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "").lower()
 
 # Configurações FAISS
 FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "data/indexes/faiss")
 FAISS_METADATA_PATH = os.getenv("FAISS_METADATA_PATH", "data/indexes/faiss/metadata.parquet")
+# Tipo de índice (string do faiss.index_factory, ex: "SQfp16", "Flat", "IVF64,SQfp16")
+# SQfp16 armazena vetores em float16 (metade da memória, perda de recall mínima);
+# com USE_FAISS_GPU vira Flat, pois o SQ sem IVF não roda na GPU
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "SQfp16")
+# Parâmetros de busca aplicados ao criar/carregar o índice:
+# nprobe (listas IVF visitadas, limitado a nlist) e efSearch (índices HNSW)
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "4"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "40"))
+# Carrega índice salvo via mmap somente leitura (páginas compartilhadas entre processos;
+# Flat/SQ requerem FAISS com IO_FLAG_MMAP_IFC). O store carregado não aceita index()/save()
+FAISS_MMAP = os.getenv("FAISS_MMAP", "false").lower() in {"1", "true", "yes"}
+# Threads OpenMP usadas pelo FAISS (0 = todas as CPUs disponíveis ao processo)
+FAISS_NUM_THREADS = int(os.getenv("FAISS_NUM_THREADS", "0"))
 
 # Configurações FAISS GPU
 USE_FAISS_GPU = os.getenv("USE_FAISS_GPU", "false").lower() in {"1", "true", "yes"}
@@ -32,6 +49,8 @@ OPENSEARCH_INDEX = os.getenv("OPENSEARCH_INDEX", "juridico-docs")
 OPENSEARCH_USERNAME = os.getenv("OPENSEARCH_USERNAME", "")
 OPENSEARCH_PASSWORD = os.getenv("OPENSEARCH_PASSWORD", "")
 OPENSEARCH_USE_SSL = os.getenv("OPENSEARCH_USE_SSL", "false").lower() == "true"
+# Vetores kNN em float16 (engine faiss + encoder SQfp16; requer OpenSearch >= 2.13)
+OPENSEARCH_VECTOR_FP16 = os.getenv("OPENSEARCH_VECTOR_FP16", "false").lower() == "true"
 
 # Query de teste
 QUERY = os.getenv("QUERY", "direitos fundamentais")
@@ -40,6 +59,9 @@ QUERY = os.getenv("QUERY", "direitos fundamentais")
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
 
+# Cache LRU de respostas do LLM por prompt idêntico (opt-in; 0 = desativado)
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "0"))
+
 # Validação de Dados
 MIN_CHARS = int(os.getenv("MIN_CHARS", "200"))
 VALIDATION_MAX_BAD_PCT = float(os.getenv("VALIDATION_MAX_BAD_PCT", "10"))
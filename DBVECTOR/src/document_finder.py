@@ -11,6 +11,9 @@ import logging
 
 log = logging.getLogger(__name__)
 
+_RE_NUMBERS = re.compile(r'\d{4,}')
+_RE_TRIBUNAL_PREFIX = re.compile(r'^(stj|stf|seeu)_')
+
 
 class DocumentFinder:
     """Busca documentos diretamente no JSONL."""
@@ -39,10 +42,10 @@ class DocumentFinder:
         log.info(f"Buscando documento: {doc_id}")
         
         # Extrai números do doc_id (ex: "stj_hc_280533" -> ["280533"])
-        extracted_numbers = re.findall(r'\d{4,}', doc_id)
+        extracted_numbers = _RE_NUMBERS.findall(doc_id)
         
         # Extrai tribunal se presente (ex: "stj_hc_280533" -> "STJ")
-        tribunal_match = re.match(r'^(stj|stf|seeu)_', doc_id.lower())
+        tribunal_match = _RE_TRIBUNAL_PREFIX.match(doc_id.lower())
         tribunal_hint = tribunal_match.group(1).upper() if tribunal_match else None
         
         log.debug(f"Números extraídos: {extracted_numbers}, Tribunal: {tribunal_hint}")
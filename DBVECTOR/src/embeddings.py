@@ -1,7 +1,9 @@
 """
 Geração de embeddings usando sentence-transformers.
 """
+import faiss
 import numpy as np
+from functools import lru_cache
 from typing import List, Optional
 from sentence_transformers import SentenceTransformer
 from src import config
@@ -16,16 +18,41 @@ def load_model() -> SentenceTransformer:
     if _model is None:
         print(f"🔄 Carregando modelo: {config.EMBEDDING_MODEL}")
         _model = SentenceTransformer(config.EMBEDDING_MODEL)
+        if config.EMBEDDING_QUANTIZE == "int8":
+            _model = _quantize_int8(_model)
         print(f"✅ Modelo carregado! Dimensão: {_model.get_sentence_embedding_dimension()}")
+        # Vetores em cache vieram de um modelo anterior
+        _encode_single_text_cached.cache_clear()
     return _model
 
 
-def encode_texts(texts: List[str]) -> np.ndarray:
+def _quantize_int8(model: SentenceTransformer) -> SentenceTransformer:
+    """
+    Aplica quantização dinâmica int8 às camadas Linear do modelo (somente CPU).
+    
+    Pesos ficam em int8 e ativações são quantizadas em tempo de execução;
+    a saída do encode continua float32.
+    """
+    import torch
+    
+    if model.device.type != "cpu":
+        print(f"⚠️ Quantização int8 suportada apenas em CPU (device={model.device}); mantendo float32")
+        return model
+    
+    print("🔄 Quantizando modelo para int8 (dinâmica)...")
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def encode_texts(texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
     """
     Gera embeddings para lista de textos.
     
+    Todos os textos passam por uma única chamada model.encode; o modelo os
+    processa em lotes de batch_size (forward passes em GEMM, não por texto).
+    
     Args:
         texts: Lista de textos para embeddings
+        batch_size: Textos por forward pass (padrão: config.EMBEDDING_BATCH_SIZE)
         
     Returns:
         Array numpy de embeddings com shape (len(texts), embedding_dim)
@@ -39,35 +66,57 @@ def encode_texts(texts: List[str]) -> np.ndarray:
         dim = get_embedding_dimension()
         return np.zeros((0, dim), dtype=np.float32)
 
-    # Gera embeddings
+    # Gera embeddings (normalização feita abaixo, in-place)
     embeddings = model.encode(
         texts,
-        normalize_embeddings=config.NORMALIZE_EMBEDDINGS,
+        batch_size=batch_size or config.EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=False,
         show_progress_bar=len(texts) > 10,
         convert_to_numpy=True
     )
 
+    # Garante tipo float32 contíguo para compatibilidade FAISS
+    arr = np.ascontiguousarray(embeddings, dtype=np.float32)
+
     # Alguns modelos retornam vetor 1D quando len(texts)==1; garante 2D
-    arr = np.array(embeddings)
     if arr.ndim == 1:
         arr = arr.reshape(1, -1)
 
-    # Garante tipo float32 para compatibilidade FAISS
-    return arr.astype(np.float32)
+    # Normalização L2 in-place em um único passe (kernel SIMD do FAISS)
+    if config.NORMALIZE_EMBEDDINGS:
+        faiss.normalize_L2(arr)
+
+    return arr
 
 
 def encode_single_text(text: str) -> np.ndarray:
     """
     Gera embedding para um único texto.
     
+    Resultados são cacheados (LRU) por texto e configuração do modelo
+    (nome, quantização, normalização), então queries repetidas não passam
+    de novo pelo modelo.
+    
     Args:
         text: Texto para embedding
         
     Returns:
-        Array numpy com shape (embedding_dim,)
+        Array numpy com shape (embedding_dim,); cópia do vetor em cache,
+        pode ser modificada livremente
     """
-    embeddings = encode_texts([text])
-    return embeddings[0]
+    return _encode_single_text_cached(
+        text, config.EMBEDDING_MODEL, config.EMBEDDING_QUANTIZE, config.NORMALIZE_EMBEDDINGS
+    ).copy()
+
+
+@lru_cache(maxsize=1024)
+def _encode_single_text_cached(
+    text: str, model_name: str, quantize: str, normalize: bool
+) -> np.ndarray:
+    """Embedding cacheado de encode_single_text (configuração faz parte da chave)."""
+    vector = encode_texts([text])[0]
+    vector.setflags(write=False)
+    return vector
 
 
 def get_embedding_dimension() -> int:
@@ -80,13 +80,20 @@ def generate_embeddings_from_jsonl(filepath: Path) -> np.ndarray:
     return vectors
 
 
-def inspect_embeddings(vectors: np.ndarray, near_dupes_threshold: float = 0.995) -> Dict[str, Any]:
+def inspect_embeddings(
+    vectors: np.ndarray,
+    near_dupes_threshold: float = 0.995,
+    return_pair_scores: bool = False
+) -> Dict[str, Any]:
     """
     Inspeciona embeddings e retorna relatório.
     
     Args:
         vectors: Array de vetores (N x D)
         near_dupes_threshold: Threshold de similaridade para near-duplicates
+        return_pair_scores: Se True, inclui em near_duplicates["scores"] as
+            similaridades dos pares acima do threshold (ordem decrescente), para
+            filtrar thresholds maiores sem recalcular a matriz
     
     Returns:
         Dicionário com métricas de inspeção
@@ -142,18 +149,22 @@ def inspect_embeddings(vectors: np.ndarray, near_dupes_threshold: float = 0.995)
         check_size = 1000
         check_indices = np.random.choice(num_vectors, size=check_size, replace=False)
         check_vectors = vectors[check_indices]
+        
+        # Normaliza
+        check_normalized = check_vectors / (np.linalg.norm(check_vectors, axis=1, keepdims=True) + 1e-8)
+        
+        # Matriz de similaridade
+        sim_matrix = np.dot(check_normalized, check_normalized.T)
     else:
-        check_vectors = vectors
-    
-    # Normaliza
-    check_normalized = check_vectors / (np.linalg.norm(check_vectors, axis=1, keepdims=True) + 1e-8)
-    
-    # Matriz de similaridade
-    sim_matrix = np.dot(check_normalized, check_normalized.T)
+        # A amostra acima já contém todos os vetores (permutados): a contagem de
+        # pares não depende da ordem, então reaproveita a matriz já calculada
+        sim_matrix = similarity_matrix
     
     # Conta pares acima do threshold (excluindo diagonal)
     upper_triangle = np.triu(sim_matrix, k=1)
-    near_dupes = (upper_triangle >= near_dupes_threshold).sum()
+    near_dupes_mask = upper_triangle >= near_dupes_threshold
+    near_dupes = near_dupes_mask.sum()
+    pair_scores = np.sort(upper_triangle[near_dupes_mask])[::-1] if return_pair_scores else None
     
     # Extrapola para dataset completo se foi amostrado
     if num_vectors > 1000:
@@ -191,6 +202,9 @@ def inspect_embeddings(vectors: np.ndarray, near_dupes_threshold: float = 0.995)
         }
     }
     
+    if pair_scores is not None:
+        report["near_duplicates"]["scores"] = [float(score) for score in pair_scores]
+    
     return report
 
 
@@ -6,8 +6,9 @@ import argparse
 import json
 import sys
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import AbstractSet, Any, Collection, Dict, List
 import math
+from itertools import accumulate
 
 from src import config, embeddings
 from src.storage.factory import get_store
@@ -20,7 +21,33 @@ def load_qa_dataset(filepath: Path) -> List[Dict[str, Any]]:
     return data
 
 
-def precision_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) -> float:
+# Descontos 1/log2(i + 1) do DCG pré-calculados para as posições 1..1024
+_DISCOUNTS = [1.0 / math.log2(i + 1) for i in range(1, 1025)]
+# DCG ideal acumulado: _IDCG[n - 1] = DCG com n relevantes no topo
+_IDCG = list(accumulate(_DISCOUNTS))
+
+
+def _discounts(k: int) -> List[float]:
+    """Retorna os descontos do DCG para as posições 1..k (ou mais)."""
+    if k <= len(_DISCOUNTS):
+        return _DISCOUNTS
+    return [1.0 / math.log2(i + 1) for i in range(1, k + 1)]
+
+
+def _as_set(relevant_ids: Collection[str]) -> AbstractSet[str]:
+    """Converte IDs relevantes em set (pertinência O(1)); sets são reaproveitados."""
+    if isinstance(relevant_ids, (set, frozenset)):
+        return relevant_ids
+    return frozenset(relevant_ids)
+
+
+def _count_hits(retrieved_ids: List[str], relevant_ids: Collection[str], k: int) -> int:
+    """Conta quantos dos top-K recuperados são relevantes."""
+    relevant = _as_set(relevant_ids)
+    return sum(1 for doc_id in retrieved_ids[:k] if doc_id in relevant)
+
+
+def precision_at_k(retrieved_ids: List[str], relevant_ids: Collection[str], k: int) -> float:
     """
     Calcula Precision@K.
     
@@ -29,13 +56,10 @@ def precision_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) ->
     if k == 0:
         return 0.0
     
-    top_k = retrieved_ids[:k]
-    relevant_retrieved = len([doc_id for doc_id in top_k if doc_id in relevant_ids])
-    
-    return relevant_retrieved / k
+    return _count_hits(retrieved_ids, relevant_ids, k) / k
 
 
-def recall_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) -> float:
+def recall_at_k(retrieved_ids: List[str], relevant_ids: Collection[str], k: int) -> float:
     """
     Calcula Recall@K.
     
@@ -44,44 +68,41 @@ def recall_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) -> fl
     if len(relevant_ids) == 0:
         return 0.0
     
-    top_k = retrieved_ids[:k]
-    relevant_retrieved = len([doc_id for doc_id in top_k if doc_id in relevant_ids])
-    
-    return relevant_retrieved / len(relevant_ids)
+    return _count_hits(retrieved_ids, relevant_ids, k) / len(relevant_ids)
 
 
-def mean_reciprocal_rank(retrieved_ids: List[str], relevant_ids: List[str]) -> float:
+def mean_reciprocal_rank(retrieved_ids: List[str], relevant_ids: Collection[str]) -> float:
     """
     Calcula MRR (Mean Reciprocal Rank) para uma query.
     
     MRR = 1 / (posição do primeiro doc relevante)
     Se nenhum doc relevante, retorna 0.
     """
+    relevant = _as_set(relevant_ids)
     for i, doc_id in enumerate(retrieved_ids, start=1):
-        if doc_id in relevant_ids:
+        if doc_id in relevant:
             return 1.0 / i
     
     return 0.0
 
 
-def dcg_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) -> float:
+def dcg_at_k(retrieved_ids: List[str], relevant_ids: Collection[str], k: int) -> float:
     """
     Calcula DCG@K (Discounted Cumulative Gain).
     
     DCG@K = Σ (rel_i / log2(i + 1)) para i=1..K
     onde rel_i = 1 se doc é relevante, 0 caso contrário.
     """
-    dcg = 0.0
-    top_k = retrieved_ids[:k]
-    
-    for i, doc_id in enumerate(top_k, start=1):
-        relevance = 1.0 if doc_id in relevant_ids else 0.0
-        dcg += relevance / math.log2(i + 1)
-    
-    return dcg
+    relevant = _as_set(relevant_ids)
+    hits = (
+        discount
+        for discount, doc_id in zip(_discounts(k), retrieved_ids[:k])
+        if doc_id in relevant
+    )
+    return sum(hits, 0.0)
 
 
-def ndcg_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) -> float:
+def ndcg_at_k(retrieved_ids: List[str], relevant_ids: Collection[str], k: int) -> float:
     """
     Calcula nDCG@K (Normalized DCG).
     
@@ -94,12 +115,14 @@ def ndcg_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) -> floa
     # DCG real
     actual_dcg = dcg_at_k(retrieved_ids, relevant_ids, k)
     
-    # IDCG: ordenação ideal (todos relevantes no topo)
-    ideal_ranking = relevant_ids + [f"dummy_{i}" for i in range(k)]
-    ideal_dcg = dcg_at_k(ideal_ranking, relevant_ids, k)
-    
-    if ideal_dcg == 0.0:
+    # IDCG: ordenação ideal (todos relevantes no topo), via tabela acumulada
+    n_ideal = min(k, len(relevant_ids))
+    if n_ideal == 0:
         return 0.0
+    if n_ideal <= len(_IDCG):
+        ideal_dcg = _IDCG[n_ideal - 1]
+    else:
+        ideal_dcg = sum(_discounts(n_ideal), 0.0)
     
     return actual_dcg / ideal_dcg
 
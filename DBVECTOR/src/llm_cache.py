@@ -0,0 +1,83 @@
+"""
+Cache LRU de respostas do LLM.
+Evita repetir chamadas ao provedor quando o prompt final é idêntico.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class LLMResponseCache:
+    """
+    Cache LRU (exato) de respostas do LLM, seguro para uso entre threads.
+
+    A chave é o SHA-256 de provedor, modelo e prompt final. O prompt já contém
+    a pergunta, os documentos recuperados e o histórico: a mesma pergunta com
+    contexto diferente gera outra chave.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str) -> str:
+        """Gera a chave do cache para um prompt."""
+        return hashlib.sha256(f"{provider}\0{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna a resposta em cache (marcando como recente) ou None."""
+        with self._lock:
+            resposta = self._data.get(key)
+            if resposta is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return resposta
+
+    def put(self, key: str, resposta: str) -> None:
+        """Armazena resposta, descartando a menos recente se exceder maxsize."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = resposta
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_call(
+        self,
+        key: str,
+        chamar: Callable[[], str],
+        validar: Optional[Callable[[str], Any]] = None
+    ) -> str:
+        """
+        Retorna a resposta em cache ou chama o LLM e armazena o resultado.
+        
+        Se validar for informado, a resposta nova só entra no cache depois de
+        passar por ele (ex: parse do JSON); se validar levantar exceção, ela
+        se propaga e a resposta não é guardada, então a próxima chamada
+        idêntica volta ao provedor.
+        """
+        if self.maxsize <= 0:
+            return chamar()
+        resposta = self.get(key)
+        if resposta is None:
+            resposta = chamar()
+            if validar is not None:
+                validar(resposta)
+            self.put(key, resposta)
+        return resposta
+
+    def clear(self) -> None:
+        """Esvazia o cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,17 @@
+"""
+Clientes dos provedores de LLM (OpenAI / Anthropic) com import sob demanda.
+Cada SDK leva centenas de ms para importar; só o do provedor em uso é carregado.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_client_class(provider: str):
+    """Importa (uma vez) e retorna a classe de cliente do provedor."""
+    if provider == "openai":
+        from openai import OpenAI
+        return OpenAI
+    if provider == "anthropic":
+        from anthropic import Anthropic
+        return Anthropic
+    raise ValueError(f"Provider não suportado: {provider}")
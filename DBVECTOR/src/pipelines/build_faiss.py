@@ -18,6 +18,7 @@ from typing import List, Iterator
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.storage.factory import get_faiss_store
+from src.storage.faiss_store import configure_faiss_threads
 from src.schema import get_dummy_docs, Doc
 
 
@@ -104,6 +105,7 @@ def main():
     print(f"   • Batch size: {args.batch_size} docs")
     print(f"   • Buffer: {args.buffer_batches} batches")
     print(f"   • Save every: {args.save_every if args.save_every > 0 else 'apenas no final'}")
+    print(f"   • Threads FAISS: {configure_faiss_threads()}")
     
     # Cria store FAISS
     store = get_faiss_store()
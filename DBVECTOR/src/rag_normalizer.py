@@ -5,11 +5,17 @@ Transforma consultas em linguagem natural para queries técnico-jurídicas otimi
 import os
 import json
 import logging
-from typing import Optional
-from openai import OpenAI
-from anthropic import Anthropic
+from typing import Any, Callable, Optional
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson é opcional; fallback para json da stdlib
+    _json_loads = json.loads
 
 from src.rag_schemas import QueryNormalizadaOutput, DadosExecucaoPenal
+from src.llm_cache import LLMResponseCache
+from src.llm_clients import get_client_class
+from src import config
 
 log = logging.getLogger(__name__)
 
@@ -82,7 +88,8 @@ class LegalQueryNormalizer:
         self,
         provider: str = "openai",  # "openai" ou "anthropic"
         model: Optional[str] = None,
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        cache_size: Optional[int] = None
     ):
         """
         Inicializa o normalizador.
@@ -91,6 +98,7 @@ class LegalQueryNormalizer:
             provider: Provedor do LLM ("openai" ou "anthropic")
             model: Nome do modelo (default: gpt-4o-mini ou claude-3-haiku-20240307)
             api_key: Chave da API (se None, usa variável de ambiente)
+            cache_size: Respostas do LLM em cache LRU (default: config.LLM_CACHE_SIZE; 0 desativa)
         """
         self.provider = provider.lower()
         
@@ -100,18 +108,22 @@ class LegalQueryNormalizer:
             api_key = api_key or os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY não configurada")
-            self.client = OpenAI(api_key=api_key)
+            self.client = get_client_class("openai")(api_key=api_key)
             
         elif self.provider == "anthropic":
             self.model = model or os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
             api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY não configurada")
-            self.client = Anthropic(api_key=api_key)
+            self.client = get_client_class("anthropic")(api_key=api_key)
             
         else:
             raise ValueError(f"Provider não suportado: {provider}")
         
+        self.llm_cache = LLMResponseCache(
+            config.LLM_CACHE_SIZE if cache_size is None else cache_size
+        )
+        
         log.info(f"Normalizador inicializado: {self.provider} / {self.model}")
     
     def normalizar(
@@ -132,6 +144,10 @@ class LegalQueryNormalizer:
         Raises:
             Exception: Se houver erro na chamada do LLM ou parsing
         """
+        # Consulta vazia: nada a normalizar, não chama o LLM
+        if not prompt_usuario or not prompt_usuario.strip():
+            return self._fallback_normalizacao(prompt_usuario)
+        
         # Monta prompt
         contexto = contexto_adicional or "Nenhum contexto adicional fornecido."
         prompt_final = TEMPLATE_NORMALIZADOR.format(
@@ -143,7 +159,7 @@ class LegalQueryNormalizer:
         
         try:
             # Chama LLM
-            resposta_raw = self._chamar_llm(prompt_final)
+            resposta_raw = self._chamar_llm(prompt_final, validar=self._parse_resposta)
             
             # Parse JSON
             query_normalizada = self._parse_resposta(resposta_raw)
@@ -156,7 +172,15 @@ class LegalQueryNormalizer:
             # Fallback: retorna query original sem normalização
             return self._fallback_normalizacao(prompt_usuario)
     
-    def _chamar_llm(self, prompt: str) -> str:
+    def _chamar_llm(self, prompt: str, validar: Optional[Callable[[str], Any]] = None) -> str:
+        """
+        Chama o LLM, reaproveitando a resposta em cache para prompt idêntico.
+        Com validar, só respostas que passam por ele são guardadas no cache.
+        """
+        key = self.llm_cache.make_key(self.provider, self.model, prompt)
+        return self.llm_cache.get_or_call(key, lambda: self._chamar_llm_provider(prompt), validar)
+    
+    def _chamar_llm_provider(self, prompt: str) -> str:
         """Chama o LLM apropriado."""
         if self.provider == "openai":
             response = self.client.chat.completions.create(
@@ -200,8 +224,8 @@ class LegalQueryNormalizer:
         
         # Parse JSON
         try:
-            data = json.loads(resposta_limpa)
-        except json.JSONDecodeError as e:
+            data = _json_loads(resposta_limpa)
+        except json.JSONDecodeError as e:  # orjson.JSONDecodeError é subclasse
             log.error(f"Erro ao fazer parse do JSON: {e}")
             log.error(f"Resposta recebida: {resposta_raw}")
             raise ValueError(f"LLM retornou JSON inválido: {e}")
@@ -6,11 +6,13 @@ import os
 import json
 import logging
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from datetime import datetime
 
-from openai import OpenAI
-from anthropic import Anthropic
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson é opcional; fallback para json da stdlib
+    _json_loads = json.loads
 
 from src.rag_schemas import (
     RagQueryRequest,
@@ -24,7 +26,9 @@ from src.rag_schemas import (
 from src.rag_normalizer import get_normalizer
 from src.storage.base import VectorStore
 from src.schema import SearchResult
-from src import embeddings
+from src import embeddings, config
+from src.llm_cache import LLMResponseCache
+from src.llm_clients import get_client_class
 from src.request_logger import RequestLogger
 
 log = logging.getLogger(__name__)
@@ -33,48 +37,32 @@ log = logging.getLogger(__name__)
 # ========================================
 # TEMPLATE DO PROMPT FINAL SEEU
 # ========================================
+# Instruções fixas vão na mensagem de sistema (prefixo idêntico entre chamadas,
+# aproveitado pelo cache de prompt do provedor); os campos variáveis ficam no
+# template da mensagem do usuário.
 
-TEMPLATE_RAG_SEEU = """Você é um assistente jurídico especializado em **execução penal** e no sistema **SEEU** (Sistema Eletrônico de Execução Unificado).
-
-**CONTEXTO DA CONSULTA:**
-Query original do usuário: "{query_original}"
-Query normalizada (técnica): "{query_normalizada}"
-
-**DADOS DE EXECUÇÃO PENAL IDENTIFICADOS:**
-{dados_execucao}
-
-**TEMAS RELACIONADOS:**
-{temas_execucao}
-
-**PALAVRAS-CHAVE JURÍDICAS:**
-{palavras_chave}
-
-**DOCUMENTOS JURISPRUDENCIAIS RECUPERADOS:**
-
-{documentos_contexto}
-
----
+INSTRUCOES_RAG_SEEU = """Você é um assistente jurídico especializado em **execução penal** e no sistema **SEEU** (Sistema Eletrônico de Execução Unificado).
 
 **SUA TAREFA:**
-Com base EXCLUSIVAMENTE nos documentos acima e nos dados de execução penal fornecidos, elabore uma análise jurídica estruturada.
+Com base EXCLUSIVAMENTE nos documentos recuperados e nos dados de execução penal fornecidos, elabore uma análise jurídica estruturada.
 
 **ESTRUTURA DA RESPOSTA (JSON):**
 
-{{
+{
   "contexto_seeu": "<Explique brevemente o contexto da execução penal e como o SEEU se relaciona com o caso>",
   
   "teses": [
-    {{
+    {
       "titulo": "<Título da tese jurídica>",
       "descricao": "<Explicação detalhada da tese com base na jurisprudência>",
       "documentosSuporte": [<lista de IDs dos documentos que sustentam esta tese>]
-    }}
+    }
   ],
   
   "aplicacao_caso": "<Aplicação prática ao caso concreto, considerando os dados de execução penal fornecidos>",
   
   "jurisprudencias": [
-    {{
+    {
       "docId": <ID do documento>,
       "tribunal": "<Tribunal>",
       "processo": "<Número do processo>",
@@ -82,11 +70,11 @@ Com base EXCLUSIVAMENTE nos documentos acima e nos dados de execução penal for
       "tema": "<Tema principal>",
       "relevanciaRelativa": <Relevância em %>,
       "trechoUtilizado": "<Trecho específico que fundamenta a análise>"
-    }}
+    }
   ],
   
   "avisos_limitacoes": "<Avisos sobre limitações da análise e caráter meramente informativo>"
-}}
+}
 
 **REGRAS CRÍTICAS:**
 1. Use APENAS informações presentes nos documentos fornecidos
@@ -99,31 +87,29 @@ Com base EXCLUSIVAMENTE nos documentos acima e nos dados de execução penal for
 
 Retorne apenas o JSON (sem markdown):"""
 
-
-# ========================================
-# TEMPLATE MARKDOWN PARA UX JURÍDICA SEEU
-# ========================================
-
-TEMPLATE_RAG_SEEU_MARKDOWN = """Você é um assistente jurídico especializado em **execução penal** e no sistema **SEEU**.
-
-**CONTEXTO DA CONSULTA:**
-- Query original: "{query_original}"
-- Query normalizada: "{query_normalizada}"
-
-{historico_conversa}
+TEMPLATE_RAG_SEEU = """**CONTEXTO DA CONSULTA:**
+Query original do usuário: "{query_original}"
+Query normalizada (técnica): "{query_normalizada}"
 
 **DADOS DE EXECUÇÃO PENAL IDENTIFICADOS:**
 {dados_execucao}
 
-**TEMAS RELACIONADOS:** {temas_execucao}
+**TEMAS RELACIONADOS:**
+{temas_execucao}
 
-**PALAVRAS-CHAVE JURÍDICAS:** {palavras_chave}
+**PALAVRAS-CHAVE JURÍDICAS:**
+{palavras_chave}
 
 **DOCUMENTOS JURISPRUDENCIAIS RECUPERADOS:**
 
-{documentos_contexto}
+{documentos_contexto}"""
 
----
+
+# ========================================
+# TEMPLATE MARKDOWN PARA UX JURÍDICA SEEU
+# ========================================
+
+INSTRUCOES_RAG_SEEU_MARKDOWN = """Você é um assistente jurídico especializado em **execução penal** e no sistema **SEEU**.
 
 **SUA TAREFA:**
 Gerar uma resposta em Markdown LIMPO e BEM FORMATADO. Siga as diretrizes abaixo de forma FLEXÍVEL - adapte as seções conforme necessário para responder da melhor forma possível.
@@ -140,7 +126,7 @@ Gerar uma resposta em Markdown LIMPO e BEM FORMATADO. Siga as diretrizes abaixo
 
 2. **NUNCA use placeholders genéricos.** Não escreva "[TRIBUNAL]", "[NÚMERO]", "[ANO]", "XX.X%". Se um campo específico não está disponível no documento, simplesmente não mencione esse campo - mas INCLUA todos os campos que ESTÃO disponíveis.
 
-3. **Baseie-se APENAS nos documentos fornecidos.** NÃO invente números de processos, tribunais, datas ou URLs. Use EXATAMENTE os dados fornecidos nos documentos acima.
+3. **Baseie-se APENAS nos documentos fornecidos.** NÃO invente números de processos, tribunais, datas ou URLs. Use EXATAMENTE os dados fornecidos nos documentos recuperados.
 
 4. **Se a informação for insuficiente para responder, FAÇA PERGUNTAS.** Ao invés de dar uma resposta incompleta ou genérica, pergunte ao usuário o que você precisa saber para ajudá-lo melhor. Exemplos:
    - "Para analisar melhor seu caso, preciso saber: qual é o regime atual do apenado?"
@@ -252,6 +238,23 @@ Para CADA jurisprudência com dados completos:
 
 Retorne APENAS o texto em Markdown (sem código markdown com ```):"""
 
+TEMPLATE_RAG_SEEU_MARKDOWN = """**CONTEXTO DA CONSULTA:**
+- Query original: "{query_original}"
+- Query normalizada: "{query_normalizada}"
+
+{historico_conversa}
+
+**DADOS DE EXECUÇÃO PENAL IDENTIFICADOS:**
+{dados_execucao}
+
+**TEMAS RELACIONADOS:** {temas_execucao}
+
+**PALAVRAS-CHAVE JURÍDICAS:** {palavras_chave}
+
+**DOCUMENTOS JURISPRUDENCIAIS RECUPERADOS:**
+
+{documentos_contexto}"""
+
 
 # ========================================
 # FUNÇÕES AUXILIARES
@@ -363,7 +366,8 @@ class RagService:
         store: VectorStore,
         provider: str = "openai",
         model: Optional[str] = None,
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        cache_size: Optional[int] = None
     ):
         """
         Inicializa o serviço RAG.
@@ -373,6 +377,7 @@ class RagService:
             provider: Provedor do LLM ("openai" ou "anthropic")
             model: Nome do modelo
             api_key: Chave da API
+            cache_size: Respostas do LLM em cache LRU (default: config.LLM_CACHE_SIZE; 0 desativa)
         """
         self.store = store
         self.provider = provider.lower()
@@ -383,17 +388,21 @@ class RagService:
             api_key = api_key or os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY não configurada")
-            self.client = OpenAI(api_key=api_key)
+            self.client = get_client_class("openai")(api_key=api_key)
             
         elif self.provider == "anthropic":
             self.model = model or os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022")
             api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY não configurada")
-            self.client = Anthropic(api_key=api_key)
+            self.client = get_client_class("anthropic")(api_key=api_key)
         else:
             raise ValueError(f"Provider não suportado: {provider}")
         
+        self.llm_cache = LLMResponseCache(
+            config.LLM_CACHE_SIZE if cache_size is None else cache_size
+        )
+        
         log.info(f"RagService inicializado: {self.provider} / {self.model}")
     
     def processar_consulta(
@@ -417,6 +426,11 @@ class RagService:
         Returns:
             RagQueryResponse estruturada
         """
+        # Consulta vazia: não normaliza, não gera embedding nem chama o LLM
+        if not request.promptUsuario.strip():
+            log.warning("Consulta vazia")
+            return self._resposta_vazia(request, self._query_normalizada_vazia(request))
+        
         log.info(f"Processando consulta RAG: {request.promptUsuario[:100]}...")
         
         # ETAPA 1: Normalização Jurídica
@@ -572,18 +586,41 @@ class RagService:
         log.debug(f"Prompt final montado ({len(prompt)} chars)")
         
         # Chama LLM
-        resposta_raw = self._chamar_llm(prompt)
+        resposta_raw = self._chamar_llm(
+            prompt, instrucoes=INSTRUCOES_RAG_SEEU, validar=self._parse_resposta_llm
+        )
         
         # Parse JSON
         return self._parse_resposta_llm(resposta_raw)
     
-    def _chamar_llm(self, prompt: str) -> str:
-        """Chama o LLM apropriado."""
+    def _chamar_llm(
+        self,
+        prompt: str,
+        instrucoes: Optional[str] = None,
+        validar: Optional[Callable[[str], Any]] = None
+    ) -> str:
+        """
+        Chama o LLM, reaproveitando a resposta em cache para prompt idêntico.
+        Com validar, só respostas que passam por ele são guardadas no cache.
+        """
+        key = self.llm_cache.make_key(self.provider, self.model, f"{instrucoes or ''}\0{prompt}")
+        return self.llm_cache.get_or_call(
+            key, lambda: self._chamar_llm_provider(prompt, instrucoes), validar
+        )
+    
+    def _chamar_llm_provider(self, prompt: str, instrucoes: Optional[str] = None) -> str:
+        """
+        Chama o LLM apropriado.
+        
+        As instruções fixas vão como mensagem de sistema, antes do prompt variável,
+        para que o prefixo se repita entre consultas (cache de prompt do OpenAI é
+        automático; no Anthropic o bloco é marcado com cache_control).
+        """
         if self.provider == "openai":
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "Você é um assistente jurídico especializado em execução penal. Retorne apenas JSON válido."},
+                    {"role": "system", "content": instrucoes or "Você é um assistente jurídico especializado em execução penal. Retorne apenas JSON válido."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.4,
@@ -592,13 +629,19 @@ class RagService:
             return response.choices[0].message.content.strip()
         
         elif self.provider == "anthropic":
+            kwargs = {}
+            if instrucoes:
+                kwargs["system"] = [
+                    {"type": "text", "text": instrucoes, "cache_control": {"type": "ephemeral"}}
+                ]
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=4000,
                 temperature=0.4,
                 messages=[
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                **kwargs
             )
             return response.content[0].text.strip()
         
@@ -617,8 +660,8 @@ class RagService:
         resposta_limpa = resposta_limpa.strip()
         
         try:
-            return json.loads(resposta_limpa)
-        except json.JSONDecodeError as e:
+            return _json_loads(resposta_limpa)
+        except json.JSONDecodeError as e:  # orjson.JSONDecodeError é subclasse
             log.error(f"Erro ao fazer parse do JSON do LLM: {e}")
             log.error(f"Resposta recebida: {resposta_raw[:500]}")
             raise ValueError(f"LLM retornou JSON inválido: {e}")
@@ -674,6 +717,16 @@ class RagService:
             totalDocumentosUnicos=0
         )
     
+    @staticmethod
+    def _query_normalizada_vazia(request: RagQueryRequest) -> QueryNormalizadaOutput:
+        """Normalização mínima para consulta vazia (sem chamar o normalizador)."""
+        return QueryNormalizadaOutput(
+            intencao="consulta_vazia",
+            tipoBeneficioOuTema="desconhecido",
+            queryRAG=request.promptUsuario,
+            observacoes="Consulta vazia."
+        )
+    
     def _resposta_vazia(
         self,
         request: RagQueryRequest,
@@ -717,6 +770,11 @@ class RagService:
         Returns:
             String em Markdown formatado para operadores do direito
         """
+        # Consulta vazia: não normaliza, não loga, não gera embedding nem chama o LLM
+        if not request.promptUsuario.strip():
+            log.warning("Consulta vazia")
+            return self._resposta_markdown_vazia(request, self._query_normalizada_vazia(request))
+
         # Inicializa logger de requisição para observabilidade
         req_logger = RequestLogger()
 
@@ -864,15 +922,16 @@ class RagService:
         # Formata histórico de conversa
         historico_str = ""
         if history and len(history) > 0:
-            historico_str = "**HISTÓRICO DA CONVERSA:**\n"
+            historico_partes = ["**HISTÓRICO DA CONVERSA:**\n"]
             for msg in history:
                 role_label = "Usuário" if msg.get("role") == "user" else "Assistente"
                 content = msg.get("content", "")
                 # Limita tamanho do histórico para não estourar contexto
                 if len(content) > 500:
                     content = content[:500] + "..."
-                historico_str += f"- **{role_label}:** {content}\n"
-            historico_str += "\n"
+                historico_partes.append(f"- **{role_label}:** {content}\n")
+            historico_partes.append("\n")
+            historico_str = "".join(historico_partes)
 
         # Monta prompt final com template Markdown
         prompt = TEMPLATE_RAG_SEEU_MARKDOWN.format(
@@ -888,7 +947,7 @@ class RagService:
         log.debug(f"Prompt Markdown montado ({len(prompt)} chars)")
 
         # Chama LLM e retorna Markdown direto
-        resposta_markdown = self._chamar_llm(prompt)
+        resposta_markdown = self._chamar_llm(prompt, instrucoes=INSTRUCOES_RAG_SEEU_MARKDOWN)
 
         # Remove possíveis markdown fences se o LLM insistir em adicionar
         resposta_limpa = resposta_markdown.strip()
@@ -902,7 +961,7 @@ class RagService:
         resposta_final = resposta_limpa.strip()
 
         if return_prompt:
-            return resposta_final, prompt
+            return resposta_final, f"{INSTRUCOES_RAG_SEEU_MARKDOWN}\n\n{prompt}"
         return resposta_final
     
     def _resposta_markdown_sem_rag(
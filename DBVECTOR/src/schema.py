@@ -1,8 +1,11 @@
 """
 Schema de dados para documentos jurídicos.
 """
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, List
+from dataclasses import dataclass, asdict, replace
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
 
 
 @dataclass
@@ -122,8 +125,33 @@ class SearchResponse:
 
 
 def get_dummy_docs() -> List[Doc]:
-    """Retorna documentos dummy para testes e desenvolvimento."""
-    return [
+    """
+    Retorna documentos dummy para testes e desenvolvimento.
+    
+    Os documentos são construídos uma única vez; cada chamada devolve cópias
+    (com meta próprio) para que alterações em um teste não vazem para outro.
+    """
+    return [replace(doc, meta=dict(doc.meta)) for doc in _build_dummy_docs()]
+
+
+@lru_cache(maxsize=1)
+def get_dummy_doc_vectors() -> np.ndarray:
+    """
+    Retorna embeddings dos documentos dummy, gerados uma única vez por processo.
+    
+    O array é somente leitura; use .copy() se precisar modificá-lo.
+    """
+    from src import embeddings
+    
+    vectors = embeddings.encode_texts([doc.text for doc in _build_dummy_docs()])
+    vectors.setflags(write=False)
+    return vectors
+
+
+@lru_cache(maxsize=1)
+def _build_dummy_docs() -> Tuple[Doc, ...]:
+    """Constrói os documentos dummy (cacheado; não modificar os objetos)."""
+    return (
         Doc(
             id="cf88_art5",
             title="Constituição Federal - Art. 5º",
@@ -174,4 +202,4 @@ def get_dummy_docs() -> List[Doc]:
             date="2023-11-20",
             meta={"tipo": "jurisprudencia", "classe": "recurso_especial", "materia": "direito_consumidor"}
         )
-    ]
\ No newline at end of file
+    )
@@ -1,8 +1,16 @@
 # Storage package
-from src.storage.base import VectorStore
-from src.storage.factory import get_store, get_faiss_store, get_opensearch_store
-from src.storage.faiss_store import FAISSStore
-from src.storage.opensearch_store import OpenSearchStore
+# Exports carregados sob demanda (PEP 562): importar src.storage.base não
+# puxa faiss, opensearch-py nem o modelo de embeddings do outro backend.
+import importlib
+
+_EXPORTS = {
+    "VectorStore": "src.storage.base",
+    "get_store": "src.storage.factory",
+    "get_faiss_store": "src.storage.factory",
+    "get_opensearch_store": "src.storage.factory",
+    "FAISSStore": "src.storage.faiss_store",
+    "OpenSearchStore": "src.storage.opensearch_store",
+}
 
 __all__ = [
     "VectorStore",
@@ -11,4 +19,13 @@ __all__ = [
     "get_opensearch_store", 
     "FAISSStore",
     "OpenSearchStore"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
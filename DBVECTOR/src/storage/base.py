@@ -34,6 +34,22 @@ class VectorStore(ABC):
         """
         pass
     
+    def search_batch(self, query_vectors: np.ndarray, k: int = 5) -> List[List[SearchResult]]:
+        """
+        Busca documentos similares para várias queries.
+        
+        Implementação padrão executa uma busca por vetor; stores com suporte
+        a busca em lote devem sobrescrever.
+        
+        Args:
+            query_vectors: Matriz de consulta com shape (n_queries, dim)
+            k: Número de resultados por query
+            
+        Returns:
+            Lista de resultados por query, na mesma ordem de query_vectors
+        """
+        return [self.search(query_vector, k=k) for query_vector in query_vectors]
+    
     @abstractmethod
     def get_doc_count(self) -> int:
         """Retorna número total de documentos indexados."""
@@ -1,11 +1,15 @@
 """
 Factory para criar stores baseado na configuração.
 """
+from typing import TYPE_CHECKING
+
 from src.storage.base import VectorStore
-from src.storage.faiss_store import FAISSStore
-from src.storage.opensearch_store import OpenSearchStore
 from src import config
 
+if TYPE_CHECKING:
+    from src.storage.faiss_store import FAISSStore
+    from src.storage.opensearch_store import OpenSearchStore
+
 
 def get_store() -> VectorStore:
     """
@@ -18,21 +22,27 @@ def get_store() -> VectorStore:
     
     if backend == "faiss":
         print(f"🔧 Usando backend FAISS: {config.FAISS_INDEX_PATH}")
+        from src.storage.faiss_store import FAISSStore
         return FAISSStore()
     
     elif backend == "opensearch":
         print(f"🔧 Usando backend OpenSearch: {config.OPENSEARCH_HOST}:{config.OPENSEARCH_PORT}")
+        from src.storage.opensearch_store import OpenSearchStore
         return OpenSearchStore()
     
     else:
         raise ValueError(f"Backend não suportado: {backend}. Use 'faiss' ou 'opensearch'")
 
 
-def get_faiss_store(index_path: str = None, metadata_path: str = None) -> FAISSStore:
+def get_faiss_store(
+    index_path: str = None, metadata_path: str = None, index_type: str = None, mmap: bool = None
+) -> "FAISSStore":
     """Retorna store FAISS específico (útil para testes)."""
-    return FAISSStore(index_path=index_path, metadata_path=metadata_path)
+    from src.storage.faiss_store import FAISSStore
+    return FAISSStore(index_path=index_path, metadata_path=metadata_path, index_type=index_type, mmap=mmap)
 
 
-def get_opensearch_store(index_name: str = None) -> OpenSearchStore:
+def get_opensearch_store(index_name: str = None) -> "OpenSearchStore":
     """Retorna store OpenSearch específico (útil para testes).""" 
+    from src.storage.opensearch_store import OpenSearchStore
     return OpenSearchStore(index_name=index_name)
\ No newline at end of file
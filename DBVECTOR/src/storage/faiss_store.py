@@ -6,7 +6,7 @@ import logging
 import faiss
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 from src.storage.base import VectorStore
@@ -15,12 +15,67 @@ from src import embeddings, config
 
 log = logging.getLogger(__name__)
 
+# IO_FLAG_MMAP só mapeia listas invertidas (IVF); IO_FLAG_MMAP_IFC também mapeia
+# os códigos de índices Flat/SQ. FAISS antigo sem ele: só IVF fica compartilhado
+_IO_FLAG_MMAP = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
 
 def _gpu_available():
     """Verifica se FAISS tem suporte a GPU."""
     return hasattr(faiss, "StandardGpuResources")
 
 
+def configure_faiss_threads() -> int:
+    """
+    Define o número de threads OpenMP do FAISS.
+    
+    Usa FAISS_NUM_THREADS; se 0, usa todas as CPUs disponíveis ao processo
+    (respeitando afinidade/cgroup quando suportado pelo SO). Configuração
+    global do processo: chamar uma vez na inicialização (API, pipelines).
+    """
+    num_threads = config.FAISS_NUM_THREADS
+    if num_threads <= 0:
+        if hasattr(os, "sched_getaffinity"):
+            num_threads = len(os.sched_getaffinity(0))
+        else:
+            num_threads = os.cpu_count() or 1
+    
+    faiss.omp_set_num_threads(num_threads)
+    return num_threads
+
+
+def apply_search_params(index) -> None:
+    """
+    Fixa parâmetros de busca do índice via faiss.ParameterSpace.
+    
+    IVF: nprobe = FAISS_NPROBE (limitado a nlist). HNSW: efSearch = FAISS_EF_SEARCH.
+    Índices sem esses parâmetros (Flat, SQ) não são alterados.
+    """
+    params = faiss.ParameterSpace()
+    
+    ivf_index = faiss.try_extract_index_ivf(index)
+    if ivf_index is not None:
+        params.set_index_parameter(index, "nprobe", max(1, min(config.FAISS_NPROBE, ivf_index.nlist)))
+    
+    base_index = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(base_index, faiss.IndexHNSW):
+        params.set_index_parameter(index, "efSearch", config.FAISS_EF_SEARCH)
+
+
+def resolve_index_type(index_type: str) -> str:
+    """
+    Ajusta o tipo de índice ao destino (CPU/GPU).
+    
+    index_cpu_to_gpu não clona IndexScalarQuantizer sem IVF (ex: "SQfp16"):
+    a busca ficaria na CPU. Com USE_FAISS_GPU e FAISS com GPU, usa "Flat"
+    (GpuIndexFlat); "IVF...,SQfp16" tem versão em GPU e é mantido.
+    """
+    if config.USE_FAISS_GPU and _gpu_available() and index_type.strip().upper().startswith("SQ"):
+        log.warning("Índice %s não é suportado na GPU; usando Flat.", index_type)
+        return "Flat"
+    return index_type
+
+
 def maybe_to_gpu(index):
     """
     Move índice FAISS para GPU se configurado e disponível.
@@ -47,12 +102,29 @@ def maybe_to_gpu(index):
 class FAISSStore(VectorStore):
     """Store FAISS com persistência local."""
     
-    def __init__(self, index_path: str = None, metadata_path: str = None):
+    def __init__(
+        self,
+        index_path: str = None,
+        metadata_path: str = None,
+        index_type: str = None,
+        mmap: Optional[bool] = None,
+    ):
         # Permite sobrescrever via variáveis de ambiente em tempo de execução
         self.index_path = index_path or os.getenv("FAISS_INDEX_PATH", config.FAISS_INDEX_PATH)
         self.metadata_path = metadata_path or os.getenv("FAISS_METADATA_PATH", config.FAISS_METADATA_PATH)
+        self.index_type = resolve_index_type(
+            index_type or os.getenv("FAISS_INDEX_TYPE", config.FAISS_INDEX_TYPE)
+        )
+        if mmap is None:
+            mmap_env = os.getenv("FAISS_MMAP")
+            mmap = config.FAISS_MMAP if mmap_env is None else mmap_env.lower() in {"1", "true", "yes"}
+        self.mmap = mmap
         self._index = None
+        # True quando o índice foi carregado via mmap (somente leitura)
+        self._read_only = False
         self.metadata = {}
+        # Colunas de meta (string) cacheadas para filtros por metadados
+        self._meta_columns: Dict[str, pd.Series] = {}
         
         # Cria diretórios se necessário
         Path(self.index_path).mkdir(parents=True, exist_ok=True)
@@ -69,8 +141,21 @@ class FAISSStore(VectorStore):
         index_file = self._get_index_file()
         
         if os.path.exists(index_file):
-            print(f"📁 Carregando índice FAISS: {index_file}")
-            self._index = faiss.read_index(index_file)
+            if self.mmap:
+                # Vetores ficam no page cache do SO, compartilhados entre processos
+                print(f"📁 Carregando índice FAISS (mmap): {index_file}")
+                if _IO_FLAG_MMAP == faiss.IO_FLAG_MMAP:
+                    log.warning(
+                        "FAISS %s sem IO_FLAG_MMAP_IFC: índices Flat/SQ (ex: SQfp16) são "
+                        "carregados inteiros em memória; requer faiss >= 1.11",
+                        faiss.__version__,
+                    )
+                self._index = faiss.read_index(index_file, _IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._read_only = True
+            else:
+                print(f"📁 Carregando índice FAISS: {index_file}")
+                self._index = faiss.read_index(index_file)
+            apply_search_params(self._index)
             
             # Move para GPU se configurado
             self._index = maybe_to_gpu(self._index)
@@ -87,16 +172,27 @@ class FAISSStore(VectorStore):
                     )
                 
                 self.metadata = df.set_index('internal_id').to_dict('index')
+                self._meta_columns.clear()
                 print(f"✅ Índice carregado! {len(self.metadata)} documentos")
             else:
                 print("⚠️ Arquivo de metadados não encontrado")
         else:
             print("📝 Nenhum índice FAISS encontrado - será criado novo")
     
+    def _check_writable(self) -> None:
+        """Falha se o índice foi carregado via mmap (somente leitura)."""
+        if self._read_only:
+            raise RuntimeError(
+                f"Índice FAISS em {self.index_path} carregado via mmap (somente leitura); "
+                "use mmap=False (FAISS_MMAP=false) para indexar ou salvar"
+            )
+    
     def _save_index(self) -> None:
         """Salva índice FAISS e metadados no disco."""
         if self._index is None:
             return
+        # Reescrever o arquivo mapeado truncaria as páginas em uso
+        self._check_writable()
         
         # Se o índice estiver na GPU, move para CPU antes de salvar
         index_to_save = self._index
@@ -125,10 +221,25 @@ class FAISSStore(VectorStore):
         """Converte ID do documento para ID interno FAISS (simples hash)."""
         return hash(doc_id) % (2**31 - 1)  # Positivo int32
     
-    def index(self, docs: List[Doc]) -> None:
-        """Indexa documentos no FAISS."""
+    def index(self, docs: List[Doc], vectors: Optional[np.ndarray] = None) -> None:
+        """
+        Indexa documentos no FAISS.
+        
+        Args:
+            docs: Lista de documentos para indexar
+            vectors: Embeddings já calculados para docs (mesma ordem); se None,
+                são gerados a partir de doc.text
+        """
         if not docs:
             return
+        
+        # add_with_ids em índice mapeado falha (IVF) ou aborta o processo (Flat/SQ)
+        self._check_writable()
+        
+        if vectors is not None and len(vectors) != len(docs):
+            raise ValueError(
+                f"Número de vetores ({len(vectors)}) difere do número de documentos ({len(docs)})"
+            )
             
         # Suprime mensagem repetitiva se muitos documentos
         if len(docs) > 100:
@@ -136,24 +247,31 @@ class FAISSStore(VectorStore):
         else:
             print(f"🔄 Indexando {len(docs)} documentos no FAISS...")
         
-        # Gera embeddings
-        texts = [doc.text for doc in docs]
-        vectors = embeddings.encode_texts(texts)
+        # Gera embeddings (se não fornecidos)
+        if vectors is None:
+            texts = [doc.text for doc in docs]
+            vectors = embeddings.encode_texts(texts)
         
         # Cria índice se não existir
         if self._index is None:
             dimension = vectors.shape[1]
-            print(f"📊 Criando índice FAISS com dimensão {dimension}")
+            print(f"📊 Criando índice FAISS {self.index_type} com dimensão {dimension}")
             
-            # Usa IndexFlatIP para busca por produto interno (cosseno se normalizado)
-            base_index = faiss.IndexFlatIP(dimension)
-            # Usa IndexIDMap2 para manter mapeamento de IDs
+            # Produto interno (cosseno se normalizado); IndexIDMap2 mantém mapeamento de IDs
+            base_index = faiss.index_factory(dimension, self.index_type, faiss.METRIC_INNER_PRODUCT)
             self._index = faiss.IndexIDMap2(base_index)
             
+            # Índices quantizados (IVF, PQ, ...) precisam de treino antes do add
+            if not self._index.is_trained:
+                self._index.train(vectors)
+            
+            apply_search_params(self._index)
+            
             # Move para GPU se configurado
             self._index = maybe_to_gpu(self._index)
 
         # Prepara IDs internos e metadados
+        self._meta_columns.clear()
         internal_ids = []
         for doc in docs:
             internal_id = self._doc_to_internal_id(doc.id)
@@ -191,29 +309,75 @@ class FAISSStore(VectorStore):
         if query_vector.ndim == 1:
             query_vector = query_vector.reshape(1, -1)
         
-        # Busca no FAISS
-        scores, internal_ids = self._index.search(query_vector, k)
-
-        results = []
-        for score, internal_id in zip(scores[0], internal_ids[0]):
-            if internal_id == -1:  # ID inválido
-                continue
-                
-            if internal_id in self.metadata:
-                doc_data = self.metadata[internal_id]
-                doc = Doc(
-                    id=doc_data['id'],
-                    text=doc_data['text'],
-                    title=doc_data['title'],
-                    court=doc_data['court'],
-                    code=doc_data['code'],
-                    article=doc_data['article'],
-                    date=doc_data['date'],
-                    meta=doc_data['meta']
-                )
-                results.append(SearchResult(doc=doc, score=float(score)))
-        
-        return results
+        return self.search_batch(query_vector[:1], k=k)[0]
+    
+    def search_batch(self, query_vectors: np.ndarray, k: int = 5) -> List[List[SearchResult]]:
+        """Busca documentos similares para várias queries em uma única chamada FAISS."""
+        if self._index is None or self._index.ntotal == 0:
+            return [[] for _ in range(len(query_vectors))]
+        
+        # Busca no FAISS (nq = número de queries)
+        scores, internal_ids = self._index.search(query_vectors, k)
+        
+        batch_results = []
+        for query_scores, query_ids in zip(scores, internal_ids):
+            results = []
+            for score, internal_id in zip(query_scores, query_ids):
+                if internal_id == -1:  # ID inválido
+                    continue
+                    
+                if internal_id in self.metadata:
+                    doc = self._metadata_to_doc(self.metadata[internal_id])
+                    results.append(SearchResult(doc=doc, score=float(score)))
+            batch_results.append(results)
+        
+        return batch_results
+    
+    def get_docs_by_meta(self, key: str, value_substr: str) -> List[Doc]:
+        """
+        Filtra documentos por substring em um campo de meta (ex: case_number).
+        
+        Consulta direta aos metadados em memória, sem busca vetorial.
+        
+        Args:
+            key: Campo dentro de doc.meta
+            value_substr: Substring a procurar no valor do campo
+            
+        Returns:
+            Lista de documentos cujo meta[key] contém value_substr
+        """
+        column = self._get_meta_column(key)
+        if column.empty:
+            return []
+        
+        mask = column.str.contains(value_substr, regex=False)
+        return [self._metadata_to_doc(self.metadata[internal_id]) for internal_id in column.index[mask]]
+    
+    def _get_meta_column(self, key: str) -> pd.Series:
+        """Retorna coluna meta[key] como string, indexada por ID interno (cacheada)."""
+        column = self._meta_columns.get(key)
+        if column is None:
+            values = {
+                internal_id: str((doc_data.get('meta') or {}).get(key) or '')
+                for internal_id, doc_data in self.metadata.items()
+            }
+            column = pd.Series(values, dtype=str)
+            self._meta_columns[key] = column
+        return column
+    
+    @staticmethod
+    def _metadata_to_doc(doc_data: Dict[str, Any]) -> Doc:
+        """Reconstrói Doc a partir dos metadados armazenados."""
+        return Doc(
+            id=doc_data['id'],
+            text=doc_data['text'],
+            title=doc_data['title'],
+            court=doc_data['court'],
+            code=doc_data['code'],
+            article=doc_data['article'],
+            date=doc_data['date'],
+            meta=doc_data['meta']
+        )
     
     def get_doc_count(self) -> int:
         """Retorna número de documentos indexados."""
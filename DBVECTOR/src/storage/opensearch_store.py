@@ -3,27 +3,45 @@ Store OpenSearch para busca vetorial distribuída.
 """
 import json
 import numpy as np
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional
 from opensearchpy import OpenSearch
 from opensearchpy.helpers import bulk
-from opensearchpy.exceptions import RequestError
+from opensearchpy.exceptions import NotFoundError, RequestError
 
 from src.storage.base import VectorStore  
 from src.schema import Doc, SearchResult
 from src import embeddings, config
 
 
+# Versão mínima do OpenSearch com encoder SQfp16 no engine faiss
+_FP16_MIN_VERSION = (2, 13)
+
+
+def _innerproduct_to_cosinesimil(score: float) -> float:
+    """
+    Converte score kNN de innerproduct (engine faiss) para a escala cosinesimil.
+    
+    O faiss pontua innerproduct como 1 + ip (ip >= 0) ou 1 / (1 - ip) (ip < 0);
+    o cosinesimil pontua 1 / (2 - cos). Com vetores normalizados ip == cos.
+    """
+    cos = score - 1 if score >= 1 else 1 - 1 / score
+    return 1 / (2 - cos)
+
+
 class OpenSearchStore(VectorStore):
     """Store OpenSearch com busca kNN."""
     
     def __init__(self, client: OpenSearch = None, index_name: str = None):
         self.client = client or OpenSearch(**config.get_opensearch_config())
         self.index_name = index_name or config.OPENSEARCH_INDEX
+        # space_type do campo vector no índice real (lido do mapeamento)
+        self._space_type: Optional[str] = None
         
         # Testa conexão
         try:
             info = self.client.info()
-            print(f"✅ Conectado ao OpenSearch {info['version']['number']}")
+            self.version = info['version']['number']
+            print(f"✅ Conectado ao OpenSearch {self.version}")
         except Exception as e:
             print(f"❌ Erro ao conectar no OpenSearch: {e}")
             raise
@@ -34,8 +52,41 @@ class OpenSearchStore(VectorStore):
         
         if self.client.indices.exists(index=self.index_name):
             print(f"📁 Índice '{self.index_name}' já existe")
+            self._load_space_type()
             return
         
+        # Método HNSW do campo knn_vector
+        method = {
+            "name": "hnsw",
+            "space_type": "cosinesimil" if config.NORMALIZE_EMBEDDINGS else "l2",
+            "engine": "nmslib",
+            "parameters": {
+                "ef_construction": 128,
+                "m": 24
+            }
+        }
+        if config.OPENSEARCH_VECTOR_FP16:
+            major, minor = (int(part) for part in self.version.split(".")[:2])
+            if (major, minor) < _FP16_MIN_VERSION:
+                raise ValueError(
+                    f"OPENSEARCH_VECTOR_FP16 requer OpenSearch >= 2.13 "
+                    f"(cluster em {self.version}); use OPENSEARCH_VECTOR_FP16=false"
+                )
+            # Vetores em float16 via encoder SQfp16 do engine faiss (metade da
+            # memória/banda no kNN). Com embeddings normalizados, innerproduct
+            # ordena como cosseno; _hits_to_results converte o score para a
+            # escala do cosinesimil.
+            method = {
+                "name": "hnsw",
+                "space_type": "innerproduct" if config.NORMALIZE_EMBEDDINGS else "l2",
+                "engine": "faiss",
+                "parameters": {
+                    "ef_construction": 128,
+                    "m": 24,
+                    "encoder": {"name": "sq", "parameters": {"type": "fp16"}}
+                }
+            }
+        
         # Mapeamento com campo knn_vector
         mapping = {
             "mappings": {
@@ -51,15 +102,7 @@ class OpenSearchStore(VectorStore):
                     "vector": {
                         "type": "knn_vector",
                         "dimension": dimension,
-                        "method": {
-                            "name": "hnsw",
-                            "space_type": "cosinesimil" if config.NORMALIZE_EMBEDDINGS else "l2",
-                            "engine": "nmslib",
-                            "parameters": {
-                                "ef_construction": 128,
-                                "m": 24
-                            }
-                        }
+                        "method": method
                     }
                 }
             },
@@ -75,47 +118,73 @@ class OpenSearchStore(VectorStore):
         
         print(f"🔄 Criando índice '{self.index_name}' (dim={dimension})")
         self.client.indices.create(index=self.index_name, body=mapping)
+        self._space_type = method["space_type"]
         print(f"✅ Índice criado com sucesso!")
     
-    def index(self, docs: List[Doc]) -> None:
-        """Indexa documentos no OpenSearch."""
+    def _load_space_type(self) -> Optional[str]:
+        """
+        Lê o método kNN do mapeamento do índice e guarda o space_type.
+        
+        O score depende do índice existente, não da configuração atual: avisa
+        quando OPENSEARCH_VECTOR_FP16 não corresponde ao engine do índice.
+        """
+        try:
+            mapping = self.client.indices.get_mapping(index=self.index_name)
+        except NotFoundError:
+            return None
+        
+        index_mapping = next(iter(mapping.values()))
+        method = index_mapping["mappings"]["properties"]["vector"].get("method", {})
+        self._space_type = method.get("space_type", "l2")
+        
+        index_fp16 = method.get("engine") == "faiss"
+        if index_fp16 != config.OPENSEARCH_VECTOR_FP16:
+            print(
+                f"⚠️ Índice '{self.index_name}' usa engine {method.get('engine')} "
+                f"({self._space_type}), mas OPENSEARCH_VECTOR_FP16="
+                f"{str(config.OPENSEARCH_VECTOR_FP16).lower()}; scores seguem o "
+                f"índice existente (recrie o índice para trocar a precisão)"
+            )
+        return self._space_type
+    
+    def index(self, docs: List[Doc], vectors: Optional[np.ndarray] = None) -> None:
+        """
+        Indexa documentos no OpenSearch via _bulk.
+        
+        Args:
+            docs: Lista de documentos para indexar
+            vectors: Embeddings já calculados para docs (mesma ordem); se None,
+                são gerados a partir de doc.text
+        """
         if not docs:
             return
+        
+        if vectors is not None and len(vectors) != len(docs):
+            raise ValueError(
+                f"Número de vetores ({len(vectors)}) difere do número de documentos ({len(docs)})"
+            )
             
         print(f"🔄 Indexando {len(docs)} documentos no OpenSearch...")
         
-        # Gera embeddings
-        texts = [doc.text for doc in docs]
-        vectors = embeddings.encode_texts(texts)
+        # Gera embeddings (se não fornecidos)
+        if vectors is None:
+            texts = [doc.text for doc in docs]
+            vectors = embeddings.encode_texts(texts)
         
         # Garante que o índice existe
         self.ensure_index()
         
-        # Prepara documentos para bulk insert
-        actions = []
-        for doc, vector in zip(docs, vectors):
-            action = {
-                "_index": self.index_name,
-                "_id": doc.id,
-                "_source": {
-                    "id": doc.id,
-                    "text": doc.text,
-                    "title": doc.title,
-                    "court": doc.court,
-                    "code": doc.code,
-                    "article": doc.article,
-                    "date": doc.date,
-                    "meta": doc.meta,
-                    "vector": vector.tolist()  # OpenSearch precisa de lista, não numpy array
-                }
-            }
-            # Remove campos None
-            action["_source"] = {k: v for k, v in action["_source"].items() if v is not None}
-            actions.append(action)
-        
-        # Bulk insert
+        # Bulk insert: ações geradas sob demanda (sem lista intermediária),
+        # enviadas em requisições _bulk de até 500 documentos e com um único
+        # refresh ao final (em vez de um por requisição)
         try:
-            success, failed = bulk(self.client, actions, refresh=True)
+            success, failed = bulk(
+                self.client,
+                self._bulk_actions(docs, vectors),
+                chunk_size=500,
+                request_timeout=60,
+            )
+            self.client.indices.refresh(index=self.index_name)
             print(f"✅ {success} documentos indexados, {len(failed)} falharam")
             
             if failed:
@@ -126,51 +195,125 @@ class OpenSearchStore(VectorStore):
             print(f"❌ Erro no bulk insert: {e}")
             raise
     
-    def search(self, query_vector: np.ndarray, k: int = 5) -> List[SearchResult]:
-        """Busca documentos similares usando kNN."""
-        try:
-            # Query kNN básica
-            query = {
-                "size": k,
-                "query": {
-                    "knn": {
-                        "vector": {
-                            "vector": query_vector.tolist(),
-                            "k": k
-                        }
+    def _bulk_actions(self, docs: List[Doc], vectors: np.ndarray) -> Iterator[Dict[str, Any]]:
+        """Gera as ações de indexação do _bulk, uma por documento."""
+        # OpenSearch precisa de lista, não numpy array: converte a matriz inteira
+        # em uma chamada só (float32 para não serializar dígitos de float64)
+        vector_lists = np.asarray(vectors, dtype=np.float32).tolist()
+        
+        for doc, vector in zip(docs, vector_lists):
+            source = {
+                "id": doc.id,
+                "text": doc.text,
+                "title": doc.title,
+                "court": doc.court,
+                "code": doc.code,
+                "article": doc.article,
+                "date": doc.date,
+                "meta": doc.meta,
+                "vector": vector,
+            }
+            yield {
+                "_index": self.index_name,
+                "_id": doc.id,
+                # Remove campos None
+                "_source": {k: v for k, v in source.items() if v is not None},
+            }
+    
+    def _knn_query(self, query_vector: np.ndarray, k: int) -> Dict[str, Any]:
+        """Monta o corpo de uma query kNN."""
+        return {
+            "size": k,
+            "query": {
+                "knn": {
+                    "vector": {
+                        "vector": np.asarray(query_vector, dtype=np.float32).ravel().tolist(),
+                        "k": k
                     }
-                },
-                "_source": {
-                    "excludes": ["vector"]  # Exclui vetor da resposta para economizar bandwidth
                 }
+            },
+            "_source": {
+                "excludes": ["vector"]  # Exclui vetor da resposta para economizar bandwidth
             }
+        }
+    
+    def _hits_to_results(self, hits: List[Dict[str, Any]]) -> List[SearchResult]:
+        """Converte hits do OpenSearch em SearchResult."""
+        if hits and self._space_type is None:
+            self._load_space_type()
+        # Índice fp16 usa innerproduct: devolve o score na escala do cosinesimil
+        innerproduct = self._space_type == "innerproduct"
+        results = []
+        for hit in hits:
+            source = hit["_source"]
+            doc = Doc(
+                id=source["id"],
+                text=source["text"],
+                title=source.get("title"),
+                court=source.get("court"),
+                code=source.get("code"),
+                article=source.get("article"),
+                date=source.get("date"),
+                meta=source.get("meta")
+            )
             
-            response = self.client.search(index=self.index_name, body=query)
-            
-            results = []
-            for hit in response["hits"]["hits"]:
-                source = hit["_source"]
-                doc = Doc(
-                    id=source["id"],
-                    text=source["text"],
-                    title=source.get("title"),
-                    court=source.get("court"),
-                    code=source.get("code"),
-                    article=source.get("article"),
-                    date=source.get("date"),
-                    meta=source.get("meta")
-                )
-                
-                # OpenSearch kNN retorna score normalizado [0,1]
-                score = hit["_score"]
-                results.append(SearchResult(doc=doc, score=score))
-            
-            return results
+            # OpenSearch kNN retorna score normalizado [0,1]
+            score = hit["_score"]
+            if innerproduct:
+                score = _innerproduct_to_cosinesimil(score)
+            results.append(SearchResult(doc=doc, score=score))
+        
+        return results
+    
+    def search(self, query_vector: np.ndarray, k: int = 5) -> List[SearchResult]:
+        """Busca documentos similares usando kNN."""
+        try:
+            response = self.client.search(index=self.index_name, body=self._knn_query(query_vector, k))
+            return self._hits_to_results(response["hits"]["hits"])
             
         except Exception as e:
             print(f"❌ Erro na busca OpenSearch: {e}")
             return []
     
+    def search_batch(self, query_vectors: np.ndarray, k: int = 5) -> List[List[SearchResult]]:
+        """
+        Busca kNN para várias queries em uma única requisição _msearch.
+        
+        Args:
+            query_vectors: Matriz de consulta com shape (n_queries, dim)
+            k: Número de resultados por query
+            
+        Returns:
+            Lista de resultados por query, na mesma ordem de query_vectors
+        """
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        if query_vectors.ndim == 1:
+            query_vectors = query_vectors.reshape(1, -1)
+        if len(query_vectors) == 0:
+            return []
+        
+        # Corpo NDJSON: linha de cabeçalho + linha de query, por consulta
+        body = []
+        for query_vector in query_vectors:
+            body.append({"index": self.index_name})
+            body.append(self._knn_query(query_vector, k))
+        
+        try:
+            response = self.client.msearch(body=body)
+        except Exception as e:
+            print(f"❌ Erro na busca em lote OpenSearch: {e}")
+            return [[] for _ in range(len(query_vectors))]
+        
+        batch_results = []
+        for item in response["responses"]:
+            if "error" in item:
+                print(f"❌ Erro na busca OpenSearch: {item['error']}")
+                batch_results.append([])
+            else:
+                batch_results.append(self._hits_to_results(item["hits"]["hits"]))
+        
+        return batch_results
+    
     def get_doc_count(self) -> int:
         """Retorna número de documentos no índice."""
         try:
@@ -183,4 +326,5 @@ class OpenSearchStore(VectorStore):
         """Remove o índice (útil para testes)."""
         if self.client.indices.exists(index=self.index_name):
             self.client.indices.delete(index=self.index_name)
+            self._space_type = None
             print(f"🗑️ Índice '{self.index_name}' removido")
\ No newline at end of file
@@ -11,10 +11,37 @@ import json
 import logging
 import sys
 import hashlib
+import io
+import math
+import mmap
+import multiprocessing
+import os
 import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import Any, Dict, List, Set, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:  # orjson é opcional; fallback para json da stdlib
+    orjson = None
+
+try:
+    from pyroaring import BitMap64
+except ImportError:  # pyroaring é opcional; fallback para set
+    BitMap64 = None
+
+try:
+    import ijson
+except ImportError:  # ijson é opcional; arrays grandes são carregados inteiros
+    ijson = None
+
+# Erros de parse de JSON: json/orjson levantam ValueError
+_JSON_ERRORS = (ValueError, ijson.JSONError) if ijson is not None else (ValueError,)
+
 
 # Configuração de logging
 logger = logging.getLogger("rag.tratamento_dados")
@@ -24,6 +51,264 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+# Normalização de case_number: remove "despacho" e mantém apenas dígitos
+_RE_DESPACHO = re.compile(r"\bdespacho\b", flags=re.IGNORECASE)
+_RE_NON_DIGITS = re.compile(r"[^\d]")
+
+
+# Campos onde o nome do cluster pode aparecer (filtro de "unknown")
+_CLUSTER_FIELDS = ("cluster_name", "cluster", "clusterName", "cluster_nome")
+
+
+# Maior quantidade de dígitos que sempre cabe em uint64 (10**19 < 2**64)
+_MAX_INT_KEY_DIGITS = 19
+
+
+# Tamanho dos blocos de leitura de arquivos JSONL
+_READ_BLOCK_SIZE = 1 << 20  # 1 MiB
+
+# Bytes de espaço em branco do JSON (RFC 8259): ' ', '\t', '\n', '\r'
+_JSON_WHITESPACE = frozenset(b" \t\n\r")
+
+# Arquivos .json com array no topo a partir deste tamanho são lidos em
+# streaming (ijson): memória constante em vez de materializar o array inteiro
+_STREAM_JSON_MIN_BYTES = 64 << 20  # 64 MiB
+
+# Buffer de escrita do arquivo de saída (agrupa milhares de registros por write())
+_WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+
+def _iter_lines(f, block_size: Optional[int] = None):
+    """
+    Itera as linhas (bytes, sem o '\n') de um arquivo binário.
+
+    Arquivos em disco são mapeados em memória (mmap) e varridos com find(b"\n"):
+    sem cópia do bloco lido nem concatenação de sobras, e o SO pagina sob
+    demanda. Vantajoso para registros longos (documentos jurídicos). Streams
+    sem fileno ou arquivos vazios (não mapeáveis) caem na leitura em blocos.
+    """
+    try:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # inclui io.UnsupportedOperation e arquivo vazio
+        yield from _iter_lines_blocks(f, block_size)
+        return
+
+    with buf:
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            # Leitura estritamente sequencial: o kernel antecipa o readahead
+            # (I/O sobreposto ao parse) e descarta páginas já lidas
+            buf.madvise(mmap.MADV_SEQUENTIAL)
+        find = buf.find
+        pos = 0
+        while True:
+            nl = find(b"\n", pos)
+            if nl < 0:
+                break
+            yield buf[pos:nl]
+            pos = nl + 1
+        if pos < len(buf):
+            yield buf[pos:]
+
+
+def _map_file(f):
+    """
+    Mapeia o arquivo inteiro em memória somente leitura.
+    Arquivos vazios ou sem fileno (não mapeáveis) são lidos como bytes.
+    """
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return f.read()
+
+
+def _starts_with_array(f) -> bool:
+    """Verifica se o JSON começa com '[' (ignorando espaços) e volta ao início."""
+    head = f.read(4096).lstrip()
+    f.seek(0)
+    return head[:1] == b"["
+
+
+def _is_valid_json_stream(f) -> bool:
+    """
+    Valida o JSON inteiro com ijson.basic_parse (eventos, memória constante)
+    e volta ao início. Feito antes do streaming para que um arquivo malformado
+    não deixe escritos os registros anteriores ao erro.
+    """
+    try:
+        for _ in ijson.basic_parse(f):
+            pass
+        return True
+    except ijson.JSONError:
+        return False
+    finally:
+        f.seek(0)
+
+
+def _iter_lines_blocks(f, block_size: Optional[int] = None):
+    """
+    Itera as linhas (bytes, sem o '\n') de um arquivo binário lendo em blocos.
+
+    Evita o iterador linha a linha do Python: cada bloco é quebrado de uma vez
+    com bytes.split (memchr em C) e a linha incompleta do fim é concatenada
+    ao bloco seguinte.
+    """
+    block_size = block_size or _READ_BLOCK_SIZE
+    tail = b""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        lines = (tail + block).split(b"\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+class _NonFiniteFloat(float):
+    """
+    NaN/Infinity lido pelo fallback da stdlib. O orjson recusa subclasses de
+    float (em vez de gravar null), então a escrita também cai para a stdlib
+    e o valor sai como no json original.
+    """
+
+
+def _parse_float_std(s: str) -> float:
+    value = float(s)
+    return value if math.isfinite(value) else _NonFiniteFloat(value)
+
+
+def _std_json_loads(data: Any) -> Any:
+    """
+    json.loads da stdlib (aceita NaN/Infinity e inteiros de qualquer tamanho),
+    marcando valores não finitos para a escrita manter NaN/Infinity.
+    """
+    if not isinstance(data, (bytes, str)):
+        data = bytes(data)  # memoryview/mmap
+    return json.loads(data, parse_constant=_NonFiniteFloat, parse_float=_parse_float_std)
+
+
+def _std_json_dumps_line(record: Any) -> bytes:
+    """Serializa registro como linha JSONL (UTF-8) com json da stdlib."""
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _std_json_dumps_key(value: Any) -> bytes:
+    """Serializa valor com chaves ordenadas (forma canônica p/ hash de dedupe)."""
+    return json.dumps(value, sort_keys=True).encode()
+
+
+# Pré-checagem conservadora de número JSON com 19+ dígitos, que pode não caber
+# em int64/uint64 (o orjson o converteria em float, perdendo dígitos). Também
+# casa dentro de strings (ex.: "a,1234567890123456789"); nesse caso o registro
+# só vai à toa para o json da stdlib, mais lento, com o mesmo resultado.
+_RE_JSON_BIG_INT = re.compile(rb"(?:^|[\[:,])\s*-?\d{19}")
+
+
+if orjson is not None:
+
+    def _json_loads(data: Any) -> Any:
+        """
+        Faz parse com orjson, caindo para o json da stdlib quando o orjson
+        mudaria o resultado: inteiros acima de 64 bits (viram float no orjson)
+        ou entrada que só a stdlib aceita (NaN/Infinity, surrogates isolados).
+        """
+        if _RE_JSON_BIG_INT.search(data) is None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        return _std_json_loads(data)
+
+    def _json_dumps_line(record: Any) -> bytes:
+        """Serializa registro como linha JSONL (UTF-8); o '\n' sai do encoder C."""
+        try:
+            return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        except orjson.JSONEncodeError:  # int > 64 bits, NaN/Infinity
+            return _std_json_dumps_line(record)
+
+    def _json_dumps_key(value: Any) -> bytes:
+        """Serializa valor com chaves ordenadas (forma canônica p/ hash de dedupe)."""
+        try:
+            return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+        except orjson.JSONEncodeError:
+            return _std_json_dumps_key(value)
+
+else:
+    _json_loads = json.loads
+    _json_dumps_line = _std_json_dumps_line
+    _json_dumps_key = _std_json_dumps_key
+
+
+def _is_canonical_uint(key_str: str) -> bool:
+    """Verifica se key_str é um inteiro ASCII sem zeros à esquerda que cabe em uint64."""
+    return (
+        key_str.isascii()
+        and key_str.isdecimal()
+        and len(key_str) <= _MAX_INT_KEY_DIGITS
+        and (key_str[0] != "0" or key_str == "0")
+    )
+
+
+def _iter_input_files(root: Path, extensions: Tuple[str, ...], ignore_hidden: bool = True):
+    """
+    Percorre a árvore sob root com os.scandir em uma única passada.
+
+    O tipo de cada entrada vem do cache do DirEntry (sem stat extra na maioria
+    dos sistemas de arquivos), diretórios não são seguidos via symlink e
+    entradas ocultas (iniciadas por '.') são podadas já na varredura.
+    Gera os caminhos (str) dos arquivos com uma das extensões.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError as e:
+            logger.warning(f"Cannot read directory: {e}")
+            continue
+        with it:
+            for entry in it:
+                if ignore_hidden and entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(extensions) and entry.is_file():
+                    yield entry.path
+
+
+class _BloomFilter:
+    """
+    Filtro de Bloom (bit array em bytearray) para deduplicação aproximada.
+
+    Memória fixa, dimensionada por capacidade e taxa de falso positivo
+    (~3 MB para 1M chaves a 1e-5, contra centenas de MB de strings num set).
+    Falsos positivos descartam registros inéditos; sem falsos negativos.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity deve ser > 0 e error_rate entre 0 e 1")
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def add(self, key: str) -> bool:
+        """Adiciona key; retorna True se ela (provavelmente) já estava presente."""
+        # Double hashing (Kirsch-Mitzenmacher): k posições a partir de um digest de 128 bits
+        digest = hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits = self._bits
+        num_bits = self.num_bits
+        present = True
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                present = False
+                bits[pos >> 3] |= mask
+        return present
+
 
 class DataProcessor:
     """Processador de dados para consolidação e limpeza."""
@@ -36,6 +321,10 @@ class DataProcessor:
         ignore_hidden: bool = True,
         extensions: List[str] = None,
         quiet: bool = False,
+        dedupe_capacity: Optional[int] = None,
+        dedupe_fpr: float = 1e-5,
+        workers: int = 1,
+        incremental: bool = False,
     ):
         self.input_dir = input_dir
         self.output_file = output_file
@@ -43,6 +332,16 @@ class DataProcessor:
         self.ignore_hidden = ignore_hidden
         self.extensions = extensions or [".json", ".jsonl"]
         self.quiet = quiet
+        self.workers = max(1, workers)
+        self.incremental = incremental
+        # Manifesto {arquivo: sha256} da última execução incremental (oculto e
+        # sem extensão .json para nunca ser varrido como entrada)
+        self.manifest_file = output_file.with_name(f".{output_file.name}.manifest")
+        # Writer bufferizado do arquivo de saída, aberto durante process()
+        self._writer: Optional[io.BufferedWriter] = None
+        # Em workers de _process_file: shard temporário com pares de linhas
+        # (chave de dedupe em JSON, registro serializado)
+        self._shard: Optional[io.BufferedWriter] = None
 
         # Regex para limpeza de tokens ruins / HTML
         # Remove HTML tags, common HTML entities (&nbsp;), and standalone 'br' tokens
@@ -62,10 +361,19 @@ class DataProcessor:
             "filtered_unknown": 0,
             "duplicates_removed": 0,
             "invalid_records": 0,
+            "files_unchanged": 0,
         }
 
         # Set para deduplicação
         self.seen_keys: Set[str] = set()
+        # Chaves numéricas (IDs, case_number) em bitmap Roaring: bem menor e mais
+        # rápido que strings num set; None se pyroaring não estiver instalado
+        self.seen_int_keys = BitMap64() if BitMap64 is not None else None
+        # Modo aproximado (opcional): filtro de Bloom com memória fixa para
+        # ingestões muito grandes; substitui set/bitmap quando configurado
+        self.bloom = (
+            _BloomFilter(dedupe_capacity, dedupe_fpr) if dedupe_capacity else None
+        )
 
         if quiet:
             logger.setLevel(logging.WARNING)
@@ -81,13 +389,21 @@ class DataProcessor:
         Verifica se o registro possui cluster_name == "unknown" (case-insensitive).
         Também verifica variantes: cluster, clusterName, cluster_nome.
         """
-        cluster_fields = ["cluster_name", "cluster", "clusterName", "cluster_nome"]
-
-        for field in cluster_fields:
-            if field in record:
-                normalized = self.normalize_cluster_value(record[field])
-                if normalized == "unknown":
-                    return True
+        for field in _CLUSTER_FIELDS:
+            value = record.get(field)
+            if value is None:
+                continue
+            if type(value) is str:
+                # "unknown" tem 7 caracteres e strip() só encurta (devolvendo o
+                # próprio objeto se não há espaço): o tamanho rejeita a maioria
+                # dos nomes de cluster sem alocar cópias para lower()
+                if len(value) >= 7:
+                    value = value.strip()
+                    if len(value) == 7 and value.lower() == "unknown":
+                        return True
+                continue
+            if self.normalize_cluster_value(value) == "unknown":
+                return True
 
         return False
 
@@ -96,8 +412,18 @@ class DataProcessor:
         Verifica se o registro deve ser removido por duplicação.
         Retorna True se for duplicado (já visto), False caso contrário.
         """
-        if self.dedupe_by == "none":
+        key_str = self.dedupe_key(record)
+        if key_str is None:
             return False
+        return self.is_seen_key(key_str)
+
+    def dedupe_key(self, record: Dict[str, Any]) -> Optional[str]:
+        """
+        Calcula a chave normalizada de deduplicação do registro.
+        Retorna None se o registro não deve participar da deduplicação.
+        """
+        if self.dedupe_by == "none":
+            return None
 
         key_field = self.dedupe_by
         key_value = record.get(key_field)
@@ -105,27 +431,41 @@ class DataProcessor:
         if not key_value:
             # Se não tem o campo de deduplicação, não deduplica esse item
             logger.debug(f"Record without {key_field} field, skipping deduplication")
-            return False
+            return None
 
-        # Normalizar chave para string
-        if isinstance(key_value, (dict, list)):
+        # Normalizar chave para string (str já é a chave, sem conversão)
+        if type(key_value) is str:
+            key_str = key_value
+        elif isinstance(key_value, (dict, list)):
             # Para objetos complexos, usar hash do JSON
-            key_str = hashlib.md5(
-                json.dumps(key_value, sort_keys=True).encode()
-            ).hexdigest()
+            key_str = hashlib.md5(_json_dumps_key(key_value)).hexdigest()
         else:
             key_str = str(key_value)
 
         # Normalização especial para case_number: remove "despacho" e mantém só números
         if key_field == "case_number":
-            # Remove "despacho" (case-insensitive)
-            key_str = re.sub(r'\bdespacho\b', '', key_str, flags=re.IGNORECASE)
-            # Mantém apenas dígitos
-            key_str = re.sub(r'[^\d]', '', key_str)
+            # Remove "despacho" (case-insensitive) e mantém apenas dígitos
+            if not key_str.isdecimal():
+                key_str = _RE_NON_DIGITS.sub("", _RE_DESPACHO.sub("", key_str))
             if not key_str:
                 # Se não sobrou nenhum número, não deduplica
                 logger.debug(f"case_number without digits after normalization, skipping deduplication")
-                return False
+                return None
+
+        return key_str
+
+    def is_seen_key(self, key_str: str) -> bool:
+        """Registra a chave e retorna True se ela já tinha sido vista."""
+        if self.bloom is not None:
+            return self.bloom.add(key_str)
+
+        if self.seen_int_keys is not None and _is_canonical_uint(key_str):
+            # "123" e 123 normalizam para a mesma chave; "0123" continua no set
+            key_int = int(key_str)
+            if key_int in self.seen_int_keys:
+                return True
+            self.seen_int_keys.add(key_int)
+            return False
 
         if key_str in self.seen_keys:
             return True
@@ -141,8 +481,33 @@ class DataProcessor:
         written = 0
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(file_path, "rb") as f:
+                if (
+                    ijson is not None
+                    and os.fstat(f.fileno()).st_size >= _STREAM_JSON_MIN_BYTES
+                    and _starts_with_array(f)
+                    and _is_valid_json_stream(f)
+                ):
+                    return self._process_json_stream(f)
+                # Inválido para o ijson (malformado, NaN, inteiro > 64 bits):
+                # segue para o parse inteiro, que rejeita o arquivo todo ou
+                # aceita o que a stdlib aceita
+
+                if orjson is not None:
+                    # orjson lê direto do mmap (page cache), sem a cópia de
+                    # f.read(); json da stdlib exige bytes
+                    raw = _map_file(f)
+                else:
+                    raw = f.read()
+                try:
+                    if isinstance(raw, mmap.mmap):
+                        with memoryview(raw) as view:
+                            data = _json_loads(view)
+                    else:
+                        data = _json_loads(raw)
+                finally:
+                    if isinstance(raw, mmap.mmap):
+                        raw.close()
 
             # Se for lista, iterar elementos
             if isinstance(data, list):
@@ -158,13 +523,26 @@ class DataProcessor:
                     f"File {file_path} contains neither list nor object, skipping"
                 )
 
-        except json.JSONDecodeError as e:
+        except _JSON_ERRORS as e:
             logger.warning(f"Invalid JSON in {file_path}: {e}")
         except Exception as e:
             logger.warning(f"Error reading {file_path}: {e}")
 
         return written
 
+    def _process_json_stream(self, f) -> int:
+        """
+        Processa um array JSON grande em streaming com ijson (backend C yajl2
+        quando disponível): um registro por vez, memória independente do
+        tamanho do arquivo. O arquivo já deve ter passado por
+        _is_valid_json_stream (nada é escrito de um arquivo malformado).
+        """
+        written = 0
+        for item in ijson.items(f, "item", use_float=True):
+            if self.process_record(item):
+                written += 1
+        return written
+
     def process_jsonl_file(self, file_path: Path) -> int:
         """
         Processa arquivo .jsonl linha a linha.
@@ -173,21 +551,24 @@ class DataProcessor:
         written = 0
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
+            with open(file_path, "rb") as f:
+                for line_num, line in enumerate(_iter_lines(f), 1):
+                    # Linhas em branco: só chama strip() se a linha começa com
+                    # espaço; o parser JSON já aceita espaços nas bordas
+                    if not line or (line[0] in _JSON_WHITESPACE and not line.strip()):
                         continue
 
                     try:
-                        record = json.loads(line)
-                        if self.process_record(record):
-                            written += 1
-                    except json.JSONDecodeError as e:
+                        record = _json_loads(line)
+                    except ValueError as e:  # inclui UTF-8 inválido no fallback
                         logger.warning(
                             f"Invalid JSON at {file_path}:{line_num}: {e}"
                         )
                         self.stats["invalid_records"] += 1
+                        continue
+
+                    if self.process_record(record):
+                        written += 1
 
         except Exception as e:
             logger.warning(f"Error reading {file_path}: {e}")
@@ -212,6 +593,15 @@ class DataProcessor:
             self.stats["filtered_unknown"] += 1
             return False
 
+        if self._shard is not None:
+            # Modo worker: a deduplicação (global e em ordem) fica para o
+            # processo principal; aqui só calcula a chave e serializa
+            key_str = self.dedupe_key(record)
+            self.clean_text_fields(record)
+            self._shard.write(_json_dumps_line(key_str))
+            self._shard.write(_json_dumps_line(record))
+            return True
+
         # Deduplicação
         if self.should_deduplicate(record):
             self.stats["duplicates_removed"] += 1
@@ -268,39 +658,119 @@ class DataProcessor:
         if "case_number" in record and isinstance(record["case_number"], str):
             case_num = record["case_number"]
             # Remove "despacho" (case-insensitive) e mantém apenas dígitos
-            case_num = re.sub(r'\bdespacho\b', '', case_num, flags=re.IGNORECASE)
-            # Extrai apenas números
-            case_num = re.sub(r'[^\d]', '', case_num)
+            case_num = _RE_NON_DIGITS.sub("", _RE_DESPACHO.sub("", case_num))
             if case_num:
                 record["case_number"] = case_num
 
-    def write_record(self, record: Dict[str, Any]) -> None:
-        """Escreve um registro no arquivo de saída (JSONL)."""
-        with open(self.output_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    def build_manifest(self, files: List[Path]) -> Dict[str, Any]:
+        """
+        Monta o manifesto da execução: opções que afetam a saída e o SHA-256
+        do conteúdo de cada arquivo de entrada (hashlib/OpenSSL usa SHA-NI
+        quando a CPU suporta; o arquivo é lido via mmap, sem cópia).
+        """
+        digests = {}
+        for file_path in files:
+            with open(file_path, "rb") as f:
+                buf = _map_file(f)
+                try:
+                    digests[str(file_path)] = hashlib.sha256(buf).hexdigest()
+                finally:
+                    if isinstance(buf, mmap.mmap):
+                        buf.close()
+
+        return {
+            "dedupe_by": self.dedupe_by,
+            "bloom": [self.bloom.num_bits, self.bloom.num_hashes] if self.bloom else None,
+            "files": digests,
+        }
 
-    def should_process_path(self, path: Path) -> bool:
-        """Verifica se o caminho deve ser processado (respeita ignore_hidden)."""
-        if not self.ignore_hidden:
-            return True
+    def load_manifest(self) -> Optional[Dict[str, Any]]:
+        """Carrega o manifesto da última execução incremental (None se ausente/inválido)."""
+        try:
+            with open(self.manifest_file, "rb") as f:
+                return _json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def process_file(self, file_path: Path) -> int:
+        """Processa um arquivo conforme a extensão. Retorna registros escritos."""
+        if file_path.suffix == ".jsonl":
+            return self.process_jsonl_file(file_path)
+        if file_path.suffix == ".json":
+            return self.process_json_file(file_path)
+        return 0
 
-        # Verificar se alguma parte do caminho começa com '.'
-        for part in path.parts:
-            if part.startswith("."):
-                return False
+    def process_files_parallel(self, files: List[Path]) -> None:
+        """
+        Processa arquivos em paralelo com ProcessPoolExecutor.
 
-        return True
+        Cada worker faz parse, filtro, limpeza e serialização de um arquivo
+        (CPU-bound, sem GIL compartilhado) e grava o resultado em um shard
+        temporário ao lado da saída, sem manter os registros em memória. Os
+        shards são consumidos na ordem dos arquivos e a deduplicação é aplicada
+        aqui, de modo que a saída é idêntica à do processamento sequencial.
+        """
+        shard_dir = Path(
+            tempfile.mkdtemp(prefix=f".{self.output_file.name}.", dir=self.output_file.parent)
+        )
+        shards = [shard_dir / f"{i}.shard" for i in range(len(files))]
+        try:
+            # spawn: o processo pai pode ter threads (OpenMP/torch) e fork não é seguro
+            with ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results = executor.map(
+                    _process_file, files, shards, repeat(self.dedupe_by), chunksize=1
+                )
+                for file_path, shard, file_stats in zip(files, shards, results):
+                    for field in ("records_read", "filtered_unknown", "invalid_records"):
+                        self.stats[field] += file_stats[field]
+
+                    total = written = 0
+                    with open(shard, "rb") as f:
+                        lines = _iter_lines(f)
+                        for key_line in lines:
+                            line = next(lines)
+                            total += 1
+                            key_str = _json_loads(key_line)
+                            if key_str is None or not self.is_seen_key(key_str):
+                                self._writer.write(line)
+                                self._writer.write(b"\n")
+                                written += 1
+                    shard.unlink()
+
+                    self.stats["duplicates_removed"] += total - written
+
+                    self.stats["records_written"] += written
+                    if written > 0:
+                        self.stats["files_processed"] += 1
+                        logger.debug(f"{file_path}: {written} records written")
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        """
+        Escreve um registro no arquivo de saída (JSONL).
+
+        Durante process() a linha já serializada vai para o writer bufferizado
+        (um write() a cada ~1 MiB); fora dele, abre o arquivo em modo append.
+        """
+        line = _json_dumps_line(record)
+        if self._writer is not None:
+            self._writer.write(line)
+            return
+        with open(self.output_file, "ab") as f:
+            f.write(line)
 
     def find_eligible_files(self) -> List[Path]:
         """Encontra todos os arquivos elegíveis para processamento."""
-        eligible = []
-
-        for ext in self.extensions:
-            pattern = f"**/*{ext}"
-            for file_path in self.input_dir.rglob(pattern):
-                if file_path.is_file() and self.should_process_path(file_path):
-                    eligible.append(file_path)
-                    self.stats["files_scanned"] += 1
+        eligible = [
+            Path(path)
+            for path in _iter_input_files(
+                self.input_dir, tuple(self.extensions), self.ignore_hidden
+            )
+        ]
+        self.stats["files_scanned"] += len(eligible)
 
         return sorted(eligible)
 
@@ -317,6 +787,11 @@ class DataProcessor:
         logger.info(f"Input directory: {self.input_dir}")
         logger.info(f"Output file: {self.output_file}")
         logger.info(f"Deduplication: {self.dedupe_by}")
+        if self.bloom is not None:
+            logger.info(
+                f"Deduplication mode: bloom ({self.bloom.num_bits // 8:,} bytes, "
+                f"{self.bloom.num_hashes} hashes)"
+            )
 
         # Validar diretório de entrada
         if not self.input_dir.exists():
@@ -330,12 +805,32 @@ class DataProcessor:
         # Criar diretório de saída se necessário
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Limpar arquivo de saída se existir
+        # Modo incremental: se as entradas (conteúdo) e as opções são as mesmas
+        # da última execução, a saída existente é reaproveitada
+        manifest = None
+        if self.incremental:
+            output_resolved = self.output_file.resolve()
+            eligible_files = [
+                path for path in self.find_eligible_files() if path.resolve() != output_resolved
+            ]
+            manifest = self.build_manifest(eligible_files)
+            if self.output_file.exists() and manifest == self.load_manifest():
+                self.stats["files_unchanged"] = len(eligible_files)
+                logger.info(
+                    f"Inputs unchanged since last run ({len(eligible_files)} files), "
+                    f"keeping {self.output_file}"
+                )
+                return 0
+
+        # Limpar arquivo de saída (e manifesto) se existir
         if self.output_file.exists():
             self.output_file.unlink()
+        if self.manifest_file.exists():
+            self.manifest_file.unlink()
 
         # Encontrar arquivos elegíveis
-        eligible_files = self.find_eligible_files()
+        if manifest is None:
+            eligible_files = self.find_eligible_files()
 
         if not eligible_files:
             logger.error(
@@ -346,20 +841,27 @@ class DataProcessor:
 
         logger.info(f"Found {len(eligible_files)} eligible files")
 
-        # Processar cada arquivo
-        for file_path in eligible_files:
-            logger.debug(f"Processing {file_path}")
-
-            if file_path.suffix == ".jsonl":
-                written = self.process_jsonl_file(file_path)
-            elif file_path.suffix == ".json":
-                written = self.process_json_file(file_path)
-            else:
-                continue
-
-            if written > 0:
-                self.stats["files_processed"] += 1
-                logger.debug(f"  → {written} records written")
+        # Processar cada arquivo, escrevendo a saída por um único writer bufferizado
+        with io.BufferedWriter(
+            io.FileIO(self.output_file, "w"), buffer_size=_WRITE_BUFFER_SIZE
+        ) as writer:
+            self._writer = writer
+            try:
+                if self.workers > 1 and len(eligible_files) > 1:
+                    self.process_files_parallel(eligible_files)
+                else:
+                    for file_path in eligible_files:
+                        logger.debug(f"Processing {file_path}")
+                        written = self.process_file(file_path)
+                        if written > 0:
+                            self.stats["files_processed"] += 1
+                            logger.debug(f"  → {written} records written")
+            finally:
+                self._writer = None
+
+        if manifest is not None:
+            with open(self.manifest_file, "wb") as f:
+                f.write(_json_dumps_line(manifest))
 
         # Estatísticas finais
         elapsed = time.time() - start_time
@@ -379,6 +881,24 @@ class DataProcessor:
         return 0
 
 
+def _process_file(file_path: Path, shard: Path, dedupe_by: str) -> Dict[str, int]:
+    """
+    Worker de DataProcessor.process_files_parallel (nível de módulo para ser
+    picklable). Grava em shard, para cada registro mantido, a chave de dedupe
+    (JSON) e a linha serializada, e retorna as estatísticas do arquivo.
+    """
+    processor = DataProcessor(
+        input_dir=file_path.parent,
+        output_file=Path(os.devnull),
+        dedupe_by=dedupe_by,
+        quiet=True,
+    )
+    with io.BufferedWriter(io.FileIO(shard, "w"), buffer_size=_WRITE_BUFFER_SIZE) as f:
+        processor._shard = f
+        processor.process_file(file_path)
+    return processor.stats
+
+
 def main() -> int:
     """Ponto de entrada principal."""
     parser = argparse.ArgumentParser(
@@ -415,6 +935,35 @@ Exemplos:
         help="Campo para deduplicação: 'id', 'hash', 'none', ou qualquer nome de campo (ex: case_number) (default: id)",
     )
 
+    parser.add_argument(
+        "--dedupe-capacity",
+        type=int,
+        default=None,
+        help="Ativa deduplicação aproximada (filtro de Bloom, memória fixa) dimensionada "
+        "para N chaves; sem esta opção a deduplicação é exata",
+    )
+
+    parser.add_argument(
+        "--dedupe-fpr",
+        type=float,
+        default=1e-5,
+        help="Taxa de falso positivo do filtro de Bloom (default: 1e-5)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processos para ler/filtrar arquivos em paralelo; 0 = todas as CPUs (default: 1)",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reaproveita a saída existente se nenhum arquivo de entrada mudou "
+        "(manifesto SHA-256 ao lado da saída)",
+    )
+
     parser.add_argument(
         "--ignore-hidden",
         action="store_true",
@@ -462,6 +1011,10 @@ Exemplos:
         ignore_hidden=args.ignore_hidden,
         extensions=extensions,
         quiet=args.quiet,
+        dedupe_capacity=args.dedupe_capacity,
+        dedupe_fpr=args.dedupe_fpr,
+        workers=args.workers or os.cpu_count() or 1,
+        incremental=args.incremental,
     )
 
     # Executar processamento
@@ -8,10 +8,22 @@ import re
 import sys
 from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
 
 from src import config
 
+# Tokens HTML/residuais, unidos em uma única regex compilada uma vez
+_RE_BAD_TOKENS = re.compile(
+    r"\sbr\b"       # ' br' ou ' br ' (espaço antes + boundary)
+    r"|<br>"        # <br>
+    r"|<br\s*/>"    # <br/> ou <br />
+    r"|&nbsp;"      # &nbsp;
+    r"|&[a-z]+;"    # outras entidades HTML
+    r"|<[^>]+>"     # tags HTML genéricas
+)
+
 
 def load_jsonl(filepath: Path) -> List[Dict[str, Any]]:
     """Carrega documentos de arquivo JSONL."""
@@ -34,6 +46,12 @@ def check_missing_fields(doc: Dict[str, Any], required_fields: List[str]) -> boo
 
 def check_text_too_short(text: str, min_chars: int) -> bool:
     """Verifica se texto é muito curto."""
+    # strip() só encurta: texto já curto dispensa a cópia
+    if len(text) < min_chars:
+        return True
+    # Sem espaço nas pontas, strip() não muda nada (caso comum; sem cópia)
+    if not text[:1].isspace() and not text[-1:].isspace():
+        return False
     return len(text.strip()) < min_chars
 
 
@@ -42,20 +60,41 @@ def check_bad_tokens(text: str) -> bool:
     Verifica se texto contém tokens HTML/residuais indesejados.
     Procura por: ' br ', 'br ', '<br>', '<br/>', '&nbsp;', etc.
     """
-    text_lower = text.lower()
-    patterns = [
-        r'\sbr\b',      # ' br' ou ' br ' (espaço antes + boundary)
-        r'<br>',        # <br>
-        r'<br\s*/>',    # <br/> ou <br />
-        r'&nbsp;',      # &nbsp;
-        r'&[a-z]+;',    # outras entidades HTML
-        r'<[^>]+>',     # tags HTML genéricas
-    ]
+    return _RE_BAD_TOKENS.search(text.lower()) is not None
+
+
+def _is_numeric_id(doc_id: Any) -> bool:
+    """Verifica se o ID é string de dígitos ASCII canônica (sem zero à esquerda) que cabe em int64."""
+    return (
+        type(doc_id) is str
+        and doc_id.isascii()
+        and doc_id.isdecimal()
+        and len(doc_id) <= 18
+        and (doc_id[0] != "0" or doc_id == "0")
+    )
+
+
+def _duplicate_id_flags(doc_ids: List[Any]) -> Tuple[int, List[bool]]:
+    """
+    Conta IDs duplicados e marca os docs cujo ID aparece mais de uma vez.
+    IDs ausentes (None/vazios) não contam.
     
-    for pattern in patterns:
-        if re.search(pattern, text_lower):
-            return True
-    return False
+    IDs numéricos (caso comum: case_number) são agrupados em um array int64
+    com np.unique, sem montar um dict de strings; os demais usam Counter.
+    """
+    if all(not doc_id or _is_numeric_id(doc_id) for doc_id in doc_ids):
+        ids = np.fromiter(
+            (int(doc_id) if doc_id else -1 for doc_id in doc_ids),
+            dtype=np.int64,
+            count=len(doc_ids)
+        )
+        uniq, inverse, counts = np.unique(ids, return_inverse=True, return_counts=True)
+        counts[uniq < 0] = 0  # -1 marca ID ausente
+        return int((counts > 1).sum()), (counts[inverse] > 1).tolist()
+    
+    id_counts = Counter(doc_id for doc_id in doc_ids if doc_id)
+    dupe_ids = sum(1 for count in id_counts.values() if count > 1)
+    return dupe_ids, [bool(doc_id) and id_counts[doc_id] > 1 for doc_id in doc_ids]
 
 
 def validate_dataset(
@@ -91,23 +130,25 @@ def validate_dataset(
             "ok_to_proceed": True
         }
     
-    # Contadores
+    # Contadores (todas as verificações em uma única passada pelos docs)
     missing_fields_count = 0
     too_short_count = 0
     bad_tokens_count = 0
     
-    # Coleta IDs para detectar duplicatas (usa case_number como ID)
-    ids = []
+    # Por documento: ID (case_number, depois id) e se já tem algum problema
+    doc_ids = []
+    has_problem = []
     
     for doc in docs:
+        problem = False
+        
         # Campos ausentes
         if check_missing_fields(doc, required_fields):
             missing_fields_count += 1
+            problem = True
         
         # ID para duplicatas (tenta case_number primeiro, depois id)
-        doc_id = doc.get("case_number") or doc.get("id")
-        if doc_id:
-            ids.append(doc_id)
+        doc_ids.append(doc.get("case_number") or doc.get("id"))
         
         # Verifica texto (usa text_field configurável)
         text = doc.get(text_field) or doc.get("text") or ""
@@ -115,44 +156,31 @@ def validate_dataset(
             # Texto curto
             if check_text_too_short(text, min_chars):
                 too_short_count += 1
+                problem = True
             
             # Tokens ruins
             if check_bad_tokens(text):
                 bad_tokens_count += 1
+                problem = True
+        
+        has_problem.append(problem)
     
     # Duplicatas de ID
-    id_counts = Counter(ids)
-    dupe_ids = sum(1 for count in id_counts.values() if count > 1)
+    dupe_ids, is_duplicate = _duplicate_id_flags(doc_ids)
     
     # Percentuais
     missing_fields_pct = (missing_fields_count / total) * 100
     too_short_pct = (too_short_count / total) * 100
     bad_tokens_pct = (bad_tokens_count / total) * 100
     
-    # % problemas geral (considera qualquer problema)
-    # Documentos com pelo menos um problema
-    problem_docs = set()
-    for i, doc in enumerate(docs):
-        if check_missing_fields(doc, required_fields):
-            problem_docs.add(i)
-        
-        text = doc.get(text_field) or doc.get("text") or ""
-        if text:
-            if check_text_too_short(text, min_chars):
-                problem_docs.add(i)
-            if check_bad_tokens(text):
-                problem_docs.add(i)
-    
-    # Adiciona duplicatas
-    for doc_id in id_counts:
-        if id_counts[doc_id] > 1:
-            # Marca todos os docs com esse ID como problemáticos
-            for i, doc in enumerate(docs):
-                id_candidate = doc.get("case_number") or doc.get("id")
-                if id_candidate == doc_id:
-                    problem_docs.add(i)
+    # % problemas geral: docs com pelo menos um problema, contando como
+    # problemáticos todos os docs de um ID duplicado
+    problem_docs = sum(
+        1 for problem, duplicate in zip(has_problem, is_duplicate)
+        if problem or duplicate
+    )
     
-    bad_overall_pct = (len(problem_docs) / total) * 100
+    bad_overall_pct = (problem_docs / total) * 100
     
     return {
         "total": total,
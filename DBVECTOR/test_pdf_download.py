@@ -4,6 +4,7 @@ Script de teste para debug do endpoint de download de PDF.
 Testa a busca de documentos pelo case_number.
 """
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Adiciona src ao path
@@ -14,6 +15,12 @@ from src import embeddings
 import re
 
 
+@lru_cache(maxsize=1)
+def _get_store():
+    """Carrega o FAISS store uma única vez para todos os casos de teste."""
+    return get_faiss_store()
+
+
 def test_document_search(doc_id: str):
     """
     Testa busca de documento simulando o endpoint de download.
@@ -24,7 +31,7 @@ def test_document_search(doc_id: str):
     
     # Carrega store
     print("📁 Carregando FAISS store...")
-    store = get_faiss_store()
+    store = _get_store()
     print(f"✅ Store carregado: {store.get_doc_count()} documentos\n")
     
     # Extrai números do doc_id
@@ -73,29 +80,21 @@ def test_document_search(doc_id: str):
             print()
     
     # Estratégia 2: Busca direta por case_number nos metadados
-    print("\n📊 ESTRATÉGIA 2: Varredura nos metadados")
+    print("\n📊 ESTRATÉGIA 2: Filtro direto nos metadados")
     print("-" * 80)
     
-    # Busca ampla para análise
-    print(f"🔍 Buscando 500 documentos aleatórios para análise...")
-    query_vector = embeddings.encode_single_text(extracted_numbers[0])
-    results = store.search(query_vector, k=500)
-    
     matches = []
-    for result in results:
-        meta = result.doc.meta or {}
-        case_number = str(meta.get("case_number", ""))
-        
-        # Verifica se algum número extraído está no case_number
-        for num in extracted_numbers:
-            if num in case_number:
-                matches.append({
-                    'doc': result.doc,
-                    'score': result.score,
-                    'case_number': case_number,
-                    'matched_num': num
-                })
-                break
+    seen_ids = set()
+    for num in extracted_numbers:
+        for doc in store.get_docs_by_meta("case_number", num):
+            if doc.id in seen_ids:
+                continue
+            seen_ids.add(doc.id)
+            matches.append({
+                'doc': doc,
+                'case_number': str((doc.meta or {}).get("case_number", "")),
+                'matched_num': num
+            })
     
     print(f"\n✅ Encontrados {len(matches)} documentos com match no case_number!\n")
     
@@ -105,8 +104,7 @@ def test_document_search(doc_id: str):
         for i, match in enumerate(matches[:5], 1):
             doc = match['doc']
             meta = doc.meta or {}
-            print(f"\n[{i}] Score: {match['score']:.4f}")
-            print(f"    ID: {doc.id}")
+            print(f"\n[{i}] ID: {doc.id}")
             print(f"    Title: {doc.title or 'Sem título'}")
             print(f"    case_number: {match['case_number']}")
             print(f"    Matched: '{match['matched_num']}' in case_number")
@@ -4,27 +4,35 @@ Configuração de fixtures para testes.
 import os
 import tempfile
 import pytest
-from typing import List
+from typing import Dict, List
 import numpy as np
 from fastapi.testclient import TestClient
 
-from src.schema import Doc, get_dummy_docs
+from src.schema import Doc, get_dummy_docs, get_dummy_doc_vectors
 from src import embeddings, config
 
 
+# Texto do fixture sample_doc (também pré-codificado como query)
+SAMPLE_DOC_TEXT = "Este é um documento de teste para verificar funcionalidades do sistema RAG jurídico."
+
+# Consultas usadas pelos testes, codificadas juntas em um único encode
+QUERY_STRINGS = [
+    SAMPLE_DOC_TEXT,
+    "direitos fundamentais",
+    "direitos fundamentais constitucionais",
+    "direitos fundamentais constituição",
+    "qualquer query",
+    "teste",
+    "documento sobre direito penal",
+]
+
+
 @pytest.fixture
 def search_backend():
     """Fixture que retorna backend de busca configurado."""
     return os.getenv("SEARCH_BACKEND", config.SEARCH_BACKEND)
 
 
-@pytest.fixture
-def client():
-    """Fixture com TestClient da API FastAPI."""
-    from src.api.main import app
-    return TestClient(app)
-
-
 @pytest.fixture
 def dummy_docs() -> List[Doc]:
     """Fixture com documentos dummy para testes."""
@@ -37,7 +45,7 @@ def sample_doc() -> Doc:
     return Doc(
         id="test_doc_1",
         title="Documento de Teste",
-        text="Este é um documento de teste para verificar funcionalidades do sistema RAG jurídico.",
+        text=SAMPLE_DOC_TEXT,
         court="Teste",
         code="TEST",
         article="1",
@@ -45,11 +53,128 @@ def sample_doc() -> Doc:
     )
 
 
+@pytest.fixture(scope="session")
+def embedding_model():
+    """Fixture com o modelo de embedding carregado uma única vez por sessão."""
+    return embeddings.load_model()
+
+
+@pytest.fixture(scope="session")
+def encoder(embedding_model):
+    """
+    Fixture com o módulo src.embeddings já aquecido (modelo carregado e um
+    encode feito), compartilhado por toda a sessão.
+    
+    Não é autouse: testes que ajustam env vars (ex: GPU) o recebem explicitamente.
+    """
+    embeddings.encode_texts(["warmup"])
+    return embeddings
+
+
+@pytest.fixture(scope="session")
+def precomputed_queries(encoder) -> Dict[str, np.ndarray]:
+    """
+    Fixture com embeddings de QUERY_STRINGS (texto -> vetor 1D), gerados em um
+    único forward pass por sessão. Vetores somente leitura.
+    """
+    vectors = encoder.encode_texts(QUERY_STRINGS)
+    vectors.setflags(write=False)
+    return dict(zip(QUERY_STRINGS, vectors))
+
+
+@pytest.fixture(scope="session")
+def dummy_embeddings(embedding_model) -> np.ndarray:
+    """Fixture com embeddings dos documentos dummy, gerados uma vez por sessão."""
+    return get_dummy_doc_vectors()
+
+
 @pytest.fixture
-def dummy_vectors(dummy_docs) -> np.ndarray:
+def dummy_vectors(dummy_embeddings) -> np.ndarray:
     """Fixture com embeddings dos documentos dummy."""
-    texts = [doc.text for doc in dummy_docs]
-    return embeddings.encode_texts(texts)
+    return dummy_embeddings.copy()
+
+
+@pytest.fixture
+def sample_doc_vectors(precomputed_queries) -> np.ndarray:
+    """Fixture com embedding (1 x dim) do sample_doc, sem novo encode."""
+    return precomputed_queries[SAMPLE_DOC_TEXT][None, :].copy()
+
+
+def _build_dummy_index(index_dir: str) -> None:
+    """Indexa os documentos dummy e salva o índice em index_dir."""
+    from src.storage.faiss_store import FAISSStore
+
+    store = FAISSStore(
+        index_path=index_dir,
+        metadata_path=os.path.join(index_dir, "metadata.parquet")
+    )
+    store.index(get_dummy_docs(), vectors=get_dummy_doc_vectors())
+    store.save()
+
+
+@pytest.fixture(scope="session")
+def faiss_data_dir(tmp_path_factory, embedding_model) -> str:
+    """
+    Fixture com índice FAISS dos documentos dummy, construído e salvo
+    uma única vez por sessão. Testes devem tratá-lo como somente leitura.
+    
+    Com pytest-xdist (pytest -n auto), o índice é construído por um único
+    worker no diretório temporário compartilhado; os demais o reutilizam
+    (carregado via mmap, compartilhando o page cache).
+    """
+    if os.getenv("PYTEST_XDIST_WORKER") is None:
+        index_dir = str(tmp_path_factory.mktemp("faiss"))
+        _build_dummy_index(index_dir)
+        return index_dir
+
+    from filelock import FileLock
+
+    # Diretório base comum a todos os workers desta execução
+    shared_dir = tmp_path_factory.getbasetemp().parent / "faiss_shared"
+    with FileLock(str(shared_dir) + ".lock"):
+        if not (shared_dir / "index.faiss").exists():
+            shared_dir.mkdir(exist_ok=True)
+            _build_dummy_index(str(shared_dir))
+    return str(shared_dir)
+
+
+@pytest.fixture(scope="session")
+def prebuilt_store(faiss_data_dir):
+    """
+    Fixture com FAISSStore dos documentos dummy já indexados, carregado
+    (via mmap) uma única vez por sessão. Somente leitura: testes que indexam
+    ou salvam devem usar temp_faiss_path.
+    """
+    from src.storage.faiss_store import FAISSStore
+
+    return FAISSStore(
+        index_path=faiss_data_dir,
+        metadata_path=os.path.join(faiss_data_dir, "metadata.parquet"),
+        mmap=True
+    )
+
+
+@pytest.fixture(scope="session")
+def client(faiss_data_dir):
+    """
+    Fixture com TestClient da API FastAPI apontando para o índice dummy.
+    
+    O startup (store + modelo) roda uma única vez por sessão.
+    """
+    from src.api.main import app
+    
+    os.environ["FAISS_INDEX_PATH"] = faiss_data_dir
+    os.environ["FAISS_METADATA_PATH"] = os.path.join(faiss_data_dir, "metadata.parquet")
+    os.environ["FAISS_MMAP"] = "true"
+    try:
+        with TestClient(app) as test_client:
+            # Store já carregado no startup; libera o environment para os demais testes
+            for var in ("FAISS_INDEX_PATH", "FAISS_METADATA_PATH", "FAISS_MMAP"):
+                os.environ.pop(var, None)
+            yield test_client
+    finally:
+        for var in ("FAISS_INDEX_PATH", "FAISS_METADATA_PATH", "FAISS_MMAP"):
+            os.environ.pop(var, None)
 
 
 @pytest.fixture
@@ -71,10 +196,44 @@ def opensearch_test_index():
     return "test-juridico-docs"
 
 
+@pytest.fixture(scope="session")
+def opensearch_client():
+    """Cliente OpenSearch único da sessão (pool de conexões reaproveitado entre testes)."""
+    from opensearchpy import OpenSearch
+    
+    client = OpenSearch(**config.get_opensearch_config())
+    yield client
+    client.close()
+
+
 @pytest.fixture
-def query_vector() -> np.ndarray:
+def query_vector(precomputed_queries) -> np.ndarray:
     """Fixture com vetor de query para testes."""
-    return embeddings.encode_single_text("direitos fundamentais constitucionais")
+    return precomputed_queries["direitos fundamentais constitucionais"]
+
+
+# Container OpenSearch da sessão (OPENSEARCH_TESTCONTAINER=true)
+_opensearch_container = None
+
+
+def _start_opensearch_container() -> None:
+    """
+    Sobe um OpenSearch descartável via testcontainers e aponta a configuração
+    para ele. O host/porta vão para o environment: com pytest-xdist só o
+    processo principal sobe o container e os workers herdam o endereço.
+    """
+    global _opensearch_container
+    from testcontainers.opensearch import OpenSearchContainer
+
+    container = OpenSearchContainer("opensearchproject/opensearch:2.13.0")
+    container.start()
+    _opensearch_container = container
+
+    os_config = container.get_config()
+    os.environ["OPENSEARCH_HOST"] = os_config["host"]
+    os.environ["OPENSEARCH_PORT"] = str(os_config["port"])
+    config.OPENSEARCH_HOST = os_config["host"]
+    config.OPENSEARCH_PORT = int(os_config["port"])
 
 
 def pytest_configure(config):
@@ -82,12 +241,28 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "opensearch: marca testes que requerem OpenSearch disponível"
     )
+    
+    if (
+        os.getenv("OPENSEARCH_TESTCONTAINER", "false").lower() == "true"
+        and os.getenv("PYTEST_XDIST_WORKER") is None
+    ):
+        _start_opensearch_container()
+
+
+def pytest_unconfigure(config):
+    """Para o container OpenSearch da sessão, se houver."""
+    if _opensearch_container is not None:
+        _opensearch_container.stop()
 
 
 def pytest_collection_modifyitems(config, items):
     """
     Marca automaticamente para skip testes OpenSearch se container não disponível.
     """
+    # Só sonda o OpenSearch se algum teste coletado depende dele
+    if not any("opensearch" in item.keywords for item in items):
+        return
+    
     # Verifica se OpenSearch está disponível
     try:
         from opensearchpy import OpenSearch
@@ -2,47 +2,31 @@
 Testes de integração para API com backend FAISS.
 """
 import os
-import tempfile
+import asyncio
 import pytest
-from fastapi.testclient import TestClient
+import httpx
 
 # Força uso do FAISS para estes testes
 os.environ["SEARCH_BACKEND"] = "faiss"
 
-from src.api.main import app
-from src.storage.factory import get_faiss_store
-from src.schema import get_dummy_docs
+from src.api import main as api_main
+from src.storage.faiss_store import FAISSStore
 
 
 @pytest.fixture
-def test_client():
-    """Cliente de teste para FastAPI."""
-    return TestClient(app)
+def empty_store(monkeypatch, tmp_path):
+    """Substitui o store global da API por um store FAISS vazio."""
+    store = FAISSStore(
+        index_path=str(tmp_path),
+        metadata_path=os.path.join(str(tmp_path), "metadata.parquet")
+    )
+    monkeypatch.setattr(api_main, "store", store)
+    return store
 
 
-@pytest.fixture
-def setup_faiss_with_data():
-    """Configura FAISS temporário com dados dummy."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Configura paths temporários
-        os.environ["FAISS_INDEX_PATH"] = temp_dir
-        os.environ["FAISS_METADATA_PATH"] = os.path.join(temp_dir, "metadata.parquet")
-        
-        # Indexa dados dummy
-        store = get_faiss_store()
-        docs = get_dummy_docs()
-        store.index(docs)
-        
-        yield temp_dir
-        
-        # Cleanup
-        os.environ.pop("FAISS_INDEX_PATH", None)
-        os.environ.pop("FAISS_METADATA_PATH", None)
-
-
-def test_api_root(test_client):
+def test_api_root(client):
     """Testa endpoint raiz."""
-    response = test_client.get("/")
+    response = client.get("/")
     assert response.status_code == 200
     
     data = response.json()
@@ -51,131 +35,144 @@ def test_api_root(test_client):
     assert data["backend"] == "faiss"
 
 
-def test_api_health_no_data(test_client):
+def test_api_health_no_data(client, empty_store):
     """Testa health check sem dados indexados."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        os.environ["FAISS_INDEX_PATH"] = temp_dir
-        os.environ["FAISS_METADATA_PATH"] = os.path.join(temp_dir, "metadata.parquet")
-        
-        # Cria novo cliente para reinicializar store
-        with TestClient(app) as client:
-            response = client.get("/health")
-            assert response.status_code == 200
-            
-            data = response.json()
-            assert data["status"] == "healthy"
-            assert data["backend"] == "faiss"
-            assert data["documents"] == 0
-        
-        # Cleanup
-        os.environ.pop("FAISS_INDEX_PATH", None)
-        os.environ.pop("FAISS_METADATA_PATH", None)
+    response = client.get("/health")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert data["backend"] == "faiss"
+    assert data["documents"] == 0
 
 
-def test_api_health_with_data(setup_faiss_with_data):
+def test_api_health_with_data(client):
     """Testa health check com dados indexados."""
-    with TestClient(app) as client:
-        response = client.get("/health")
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert data["status"] == "healthy"
-        assert data["documents"] > 0
+    response = client.get("/health")
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert data["documents"] > 0
 
 
-def test_api_search_no_data(test_client):
+def test_api_search_no_data(client, empty_store):
     """Testa busca sem dados indexados."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        os.environ["FAISS_INDEX_PATH"] = temp_dir
-        os.environ["FAISS_METADATA_PATH"] = os.path.join(temp_dir, "metadata.parquet")
-        
-        with TestClient(app) as client:
-            response = client.post("/search", json={"q": "teste", "k": 5})
-            assert response.status_code == 404
-            assert "Nenhum documento indexado" in response.json()["detail"]
-        
-        # Cleanup
-        os.environ.pop("FAISS_INDEX_PATH", None)
-        os.environ.pop("FAISS_METADATA_PATH", None)
+    response = client.post("/search", json={"q": "teste", "k": 5})
+    assert response.status_code == 404
+    assert "Nenhum documento indexado" in response.json()["detail"]
 
 
-def test_api_search_with_data(setup_faiss_with_data):
+def test_api_search_with_data(client):
     """Testa busca com dados indexados."""
-    with TestClient(app) as client:
-        # Busca simples
-        response = client.post("/search", json={"q": "direitos fundamentais", "k": 3})
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert "query" in data
-        assert "total" in data
-        assert "backend" in data
-        assert "results" in data
-        
-        assert data["query"] == "direitos fundamentais"
-        assert data["backend"] == "faiss"
-        assert data["total"] > 0
-        assert len(data["results"]) <= 3
-        
-        # Verifica estrutura dos resultados
-        for result in data["results"]:
-            assert "id" in result
-            assert "text" in result
-            assert "score" in result
-            assert isinstance(result["score"], float)
+    # Busca simples
+    response = client.post("/search", json={"q": "direitos fundamentais", "k": 3})
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert "query" in data
+    assert "total" in data
+    assert "backend" in data
+    assert "results" in data
+    
+    assert data["query"] == "direitos fundamentais"
+    assert data["backend"] == "faiss"
+    assert data["total"] > 0
+    assert len(data["results"]) <= 3
+    
+    # Verifica estrutura dos resultados
+    for result in data["results"]:
+        assert "id" in result
+        assert "text" in result
+        assert "score" in result
+        assert isinstance(result["score"], float)
 
 
-def test_api_search_parameter_validation(setup_faiss_with_data):
+def test_api_search_parameter_validation(client):
     """Testa validação de parâmetros da busca."""
-    with TestClient(app) as client:
-        # Teste sem query
-        response = client.post("/search", json={"k": 5})
-        assert response.status_code == 422
-        
-        # Teste com k inválido (muito alto)
-        response = client.post("/search", json={"q": "teste", "k": 25})
-        assert response.status_code == 422
-        
-        # Teste com k inválido (negativo)
-        response = client.post("/search", json={"q": "teste", "k": -1})
-        assert response.status_code == 422
-        
-        # Teste válido com k=1
-        response = client.post("/search", json={"q": "teste", "k": 1})
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert len(data["results"]) <= 1
+    # Teste sem query
+    response = client.post("/search", json={"k": 5})
+    assert response.status_code == 422
+    
+    # Teste com k inválido (muito alto)
+    response = client.post("/search", json={"q": "teste", "k": 25})
+    assert response.status_code == 422
+    
+    # Teste com k inválido (negativo)
+    response = client.post("/search", json={"q": "teste", "k": -1})
+    assert response.status_code == 422
+    
+    # Teste válido com k=1
+    response = client.post("/search", json={"q": "teste", "k": 1})
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert len(data["results"]) <= 1
 
 
-def test_api_search_different_queries(setup_faiss_with_data):
+def test_api_search_different_queries(client):
     """Testa busca com diferentes tipos de consulta."""
-    with TestClient(app) as client:
-        queries = [
-            "constituição federal",
-            "habeas corpus",
-            "prescrição civil",
-            "direito consumidor"
-        ]
+    queries = [
+        "constituição federal",
+        "habeas corpus",
+        "prescrição civil",
+        "direito consumidor"
+    ]
+    
+    response = client.post("/search_batch", json={"queries": queries, "k": 2})
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["total"] == len(queries)
+    
+    for query, query_data in zip(queries, data["responses"]):
+        assert query_data["query"] == query
+        assert query_data["total"] >= 0
         
-        for query in queries:
-            response = client.post("/search", json={"q": query, "k": 2})
-            assert response.status_code == 200
-            
-            data = response.json()
-            assert data["query"] == query
-            assert data["total"] >= 0
-            
-            # Se houver resultados, verifica estrutura
-            if data["total"] > 0:
-                for result in data["results"]:
-                    assert "id" in result
-                    assert "score" in result
-                    assert result["score"] > 0
-
-
-def test_api_search_empty_query(setup_faiss_with_data):
+        # Se houver resultados, verifica estrutura
+        if query_data["total"] > 0:
+            for result in query_data["results"]:
+                assert "id" in result
+                assert "score" in result
+                assert result["score"] > 0
+
+
+def test_api_search_batch_matches_single(client):
+    """Testa que a busca em lote retorna o mesmo que buscas individuais."""
+    queries = ["habeas corpus", "prescrição civil"]
+    
+    batch = client.post("/search_batch", json={"queries": queries, "k": 3}).json()
+    
+    for query, query_data in zip(queries, batch["responses"]):
+        single = client.post("/search", json={"q": query, "k": 3}).json()
+        assert [r["id"] for r in query_data["results"]] == [r["id"] for r in single["results"]]
+
+
+@pytest.mark.asyncio
+async def test_api_search_concurrent_requests(client):
+    """Testa buscas concorrentes (encode/FAISS rodam no threadpool e se sobrepõem)."""
+    queries = ["constituição federal", "habeas corpus", "prescrição civil", "direito consumidor"]
+    
+    # Store já inicializado pelo startup do fixture client
+    transport = httpx.ASGITransport(app=api_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        responses = await asyncio.gather(
+            *[async_client.post("/search", json={"q": q, "k": 2}) for q in queries]
+        )
+    
+    for query, response in zip(queries, responses):
+        assert response.status_code == 200
+        assert response.json()["query"] == query
+
+
+def test_api_search_batch_validation(client):
+    """Testa validação de parâmetros da busca em lote."""
+    assert client.post("/search_batch", json={"queries": [], "k": 5}).status_code == 422
+    assert client.post("/search_batch", json={"queries": ["teste", " "], "k": 5}).status_code == 422
+    assert client.post("/search_batch", json={"queries": ["teste"], "k": 0}).status_code == 422
+
+
+def test_api_search_empty_query(client):
     """Testa busca com query vazia."""
-    with TestClient(app) as client:
-        response = client.post("/search", json={"q": "", "k": 5})
-        assert response.status_code == 422  # Query não pode ser vazia
\ No newline at end of file
+    response = client.post("/search", json={"q": "", "k": 5})
+    assert response.status_code == 422  # Query não pode ser vazia
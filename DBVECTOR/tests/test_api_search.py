@@ -181,16 +181,15 @@ def test_search_different_queries(client):
         "prescrição decadência"
     ]
     
-    for query in queries:
-        payload = {"q": query, "k": 5}
-        response = client.post("/search", json=payload)
-        
-        # Aceita 200 (sucesso) ou 404 (sem documentos)
-        assert response.status_code in [200, 404]
-        
-        if response.status_code == 200:
-            data = response.json()
-            assert data["query"] == query
+    payload = {"queries": queries, "k": 5}
+    response = client.post("/search_batch", json=payload)
+    
+    # Aceita 200 (sucesso) ou 404 (sem documentos)
+    assert response.status_code in [200, 404]
+    
+    if response.status_code == 200:
+        data = response.json()
+        assert [r["query"] for r in data["responses"]] == queries
 
 
 def test_search_unicode_query(client):
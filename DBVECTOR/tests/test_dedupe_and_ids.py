@@ -225,6 +225,100 @@ def test_complex_id_types(tmp_path):
     assert processor.stats["duplicates_removed"] == 1
 
 
+def test_numeric_id_edge_cases(tmp_path):
+    """Testa que IDs numéricos (bitmap) mantêm a mesma semântica das chaves string."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    
+    input_file = input_dir / "docs.jsonl"
+    docs = [
+        {"id": "0123", "text": "Zero à esquerda"},
+        {"id": 123, "text": "Numérico"},
+        {"id": "123", "text": "Numérico duplicado"},  # Duplicado
+        {"id": 12345678901234567890, "text": "Maior que uint64"},
+        {"id": "12345678901234567890", "text": "Maior que uint64 duplicado"},  # Duplicado
+    ]
+    
+    with open(input_file, "w", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc) + "\n")
+    
+    output_file = tmp_path / "output.jsonl"
+    processor = DataProcessor(
+        input_dir=input_dir,
+        output_file=output_file,
+        dedupe_by="id",
+        quiet=True
+    )
+    
+    processor.process()
+    
+    with open(output_file, "r", encoding="utf-8") as f:
+        output_docs = [json.loads(line) for line in f]
+    
+    assert [doc["id"] for doc in output_docs] == ["0123", 123, 12345678901234567890]
+    assert processor.stats["duplicates_removed"] == 2
+
+
+def test_object_ids_key_order(tmp_path):
+    """Testa que IDs objeto com as mesmas chaves em outra ordem são duplicados."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    
+    input_file = input_dir / "docs.jsonl"
+    docs = [
+        {"id": {"tribunal": "STJ", "numero": 1}, "text": "Doc 1"},
+        {"id": {"numero": 1, "tribunal": "STJ"}, "text": "Doc 1 reordenado"},  # Duplicado
+        {"id": {"tribunal": "STF", "numero": 1}, "text": "Doc 2"},
+    ]
+    
+    with open(input_file, "w", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc) + "\n")
+    
+    output_file = tmp_path / "output.jsonl"
+    processor = DataProcessor(
+        input_dir=input_dir,
+        output_file=output_file,
+        dedupe_by="id",
+        quiet=True
+    )
+    
+    processor.process()
+    
+    assert processor.stats["records_written"] == 2
+    assert processor.stats["duplicates_removed"] == 1
+
+
+def test_dedupe_bloom_filter(tmp_path):
+    """Testa deduplicação aproximada via filtro de Bloom (--dedupe-capacity)."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    
+    input_file = input_dir / "docs.jsonl"
+    docs = [{"id": f"doc_{i % 50}", "text": f"Doc {i}"} for i in range(100)]
+    
+    with open(input_file, "w", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc) + "\n")
+    
+    output_file = tmp_path / "output.jsonl"
+    processor = DataProcessor(
+        input_dir=input_dir,
+        output_file=output_file,
+        dedupe_by="id",
+        quiet=True,
+        dedupe_capacity=1000,
+        dedupe_fpr=1e-6
+    )
+    
+    processor.process()
+    
+    assert processor.bloom is not None
+    assert processor.stats["records_written"] == 50
+    assert processor.stats["duplicates_removed"] == 50
+
+
 def test_unicode_ids(tmp_path):
     """Testa que IDs com caracteres unicode funcionam corretamente."""
     input_dir = tmp_path / "input"
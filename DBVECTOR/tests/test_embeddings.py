@@ -7,14 +7,13 @@ import pytest
 from src import embeddings, config
 
 
-def test_load_model():
+def test_load_model(embedding_model):
     """Testa carregamento do modelo."""
-    model = embeddings.load_model()
-    assert model is not None
+    assert embedding_model is not None
     
     # Testa singleton - deve retornar a mesma instância
     model2 = embeddings.load_model()
-    assert model is model2
+    assert embedding_model is model2
 
 
 def test_get_embedding_dimension():
@@ -37,6 +36,35 @@ def test_encode_single_text():
     # Testa se é determinístico
     vector2 = embeddings.encode_single_text(text)
     np.testing.assert_array_equal(vector, vector2)
+    
+    # Cada chamada recebe uma cópia: alterá-la não afeta o cache
+    vector += 1
+    np.testing.assert_array_equal(embeddings.encode_single_text(text), vector2)
+
+
+def test_encode_single_text_cache_por_config(monkeypatch):
+    """Testa que o cache de encode_single_text considera modelo e normalização."""
+    chamadas = []
+    
+    def encode_fake(texts, batch_size=None):
+        chamadas.append((config.EMBEDDING_MODEL, config.NORMALIZE_EMBEDDINGS))
+        return np.full((len(texts), 3), len(chamadas), dtype=np.float32)
+    
+    monkeypatch.setattr(embeddings, "encode_texts", encode_fake)
+    monkeypatch.setattr(config, "EMBEDDING_MODEL", "modelo-a")
+    monkeypatch.setattr(config, "NORMALIZE_EMBEDDINGS", True)
+    text = "texto para o teste de cache por configuração"
+    
+    v1 = embeddings.encode_single_text(text)
+    np.testing.assert_array_equal(embeddings.encode_single_text(text), v1)
+    assert len(chamadas) == 1
+    
+    monkeypatch.setattr(config, "NORMALIZE_EMBEDDINGS", False)
+    assert embeddings.encode_single_text(text)[0] == 2
+    
+    monkeypatch.setattr(config, "EMBEDDING_MODEL", "modelo-b")
+    assert embeddings.encode_single_text(text)[0] == 3
+    assert chamadas == [("modelo-a", True), ("modelo-a", False), ("modelo-b", False)]
 
 
 def test_encode_texts():
@@ -54,9 +82,10 @@ def test_encode_texts():
     assert vectors.shape == (len(texts), config.EMBEDDING_DIM)
     
     # Cada linha deve ser diferente
-    for i in range(len(texts)):
-        for j in range(i + 1, len(texts)):
-            assert not np.array_equal(vectors[i], vectors[j])
+    assert np.unique(vectors, axis=0).shape[0] == len(texts)
+    
+    # Tamanho do batch interno não altera os embeddings
+    np.testing.assert_allclose(embeddings.encode_texts(texts, batch_size=1), vectors, atol=1e-5)
 
 
 def test_encode_texts_empty():
@@ -72,10 +101,8 @@ def test_normalization_config():
     vector = embeddings.encode_single_text(text)
     
     if config.NORMALIZE_EMBEDDINGS:
-        # Se normalizado, norma deve ser próxima de 1
-        norm = np.linalg.norm(vector)
-        assert abs(norm - 1.0) < 1e-5
+        # Se normalizado, norma deve ser próxima de 1 (|v·v - 1| ≈ 2·|norma - 1|)
+        assert abs(float(vector @ vector) - 1.0) < 2e-5
     else:
         # Se não normalizado, norma pode ser qualquer valor
-        norm = np.linalg.norm(vector)
-        assert norm > 0
\ No newline at end of file
+        assert float(vector @ vector) > 0
\ No newline at end of file
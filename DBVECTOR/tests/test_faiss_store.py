@@ -2,11 +2,13 @@
 Testes para FAISS store.
 """
 import os
+import math
 import pytest
 import numpy as np
 
 from src.storage.faiss_store import FAISSStore
 from src.schema import Doc
+from src import config
 
 
 def test_faiss_store_init(temp_faiss_path):
@@ -16,20 +18,13 @@ def test_faiss_store_init(temp_faiss_path):
     assert store.get_doc_count() == 0
 
 
-def test_faiss_store_index_and_search(temp_faiss_path, dummy_docs):
+def test_faiss_store_index_and_search(prebuilt_store, dummy_docs, precomputed_queries):
     """Testa indexação e busca no FAISS."""
-    store = FAISSStore(
-        index_path=temp_faiss_path,
-        metadata_path=os.path.join(temp_faiss_path, "test_metadata.parquet")
-    )
-    
-    # Indexa documentos
-    store.index(dummy_docs)
+    store = prebuilt_store
     assert store.get_doc_count() == len(dummy_docs)
     
     # Testa busca
-    from src import embeddings
-    query_vector = embeddings.encode_single_text("direitos fundamentais")
+    query_vector = precomputed_queries["direitos fundamentais"]
     results = store.search(query_vector, k=3)
     
     assert len(results) > 0
@@ -43,34 +38,33 @@ def test_faiss_store_index_and_search(temp_faiss_path, dummy_docs):
         assert result.doc.id in [doc.id for doc in dummy_docs]
 
 
-def test_faiss_store_persistence(temp_faiss_path, sample_doc):
+def test_faiss_store_persistence(temp_faiss_path, sample_doc, sample_doc_vectors, precomputed_queries):
     """Testa persistência do índice FAISS."""
     metadata_path = os.path.join(temp_faiss_path, "test_metadata.parquet")
     
-    # Cria store e indexa
+    # Cria store, indexa e salva (index() só altera a memória)
     store1 = FAISSStore(index_path=temp_faiss_path, metadata_path=metadata_path)
-    store1.index([sample_doc])
+    store1.index([sample_doc], vectors=sample_doc_vectors)
     assert store1.get_doc_count() == 1
+    store1.save()
     
     # Cria novo store no mesmo path - deve carregar índice existente
     store2 = FAISSStore(index_path=temp_faiss_path, metadata_path=metadata_path)
     assert store2.get_doc_count() == 1
     
     # Busca deve retornar o documento
-    from src import embeddings
-    query_vector = embeddings.encode_single_text(sample_doc.text)
+    query_vector = precomputed_queries[sample_doc.text]
     results = store2.search(query_vector, k=1)
     
     assert len(results) == 1
     assert results[0].doc.id == sample_doc.id
 
 
-def test_faiss_store_empty_search(temp_faiss_path):
+def test_faiss_store_empty_search(temp_faiss_path, precomputed_queries):
     """Testa busca em store vazio."""
     store = FAISSStore(index_path=temp_faiss_path)
     
-    from src import embeddings
-    query_vector = embeddings.encode_single_text("qualquer query")
+    query_vector = precomputed_queries["qualquer query"]
     results = store.search(query_vector, k=5)
     
     assert results == []
@@ -95,15 +89,12 @@ def test_faiss_store_doc_to_internal_id(temp_faiss_path):
     assert different_internal != internal_id1
 
 
-def test_faiss_store_query_vector_shapes(temp_faiss_path, sample_doc):
+def test_faiss_store_query_vector_shapes(prebuilt_store, precomputed_queries):
     """Testa busca com diferentes formatos de vetor."""
-    store = FAISSStore(index_path=temp_faiss_path)
-    store.index([sample_doc])
-    
-    from src import embeddings
+    store = prebuilt_store
     
     # Vetor 1D
-    query_vector_1d = embeddings.encode_single_text("teste")
+    query_vector_1d = precomputed_queries["teste"]
     results_1d = store.search(query_vector_1d, k=1)
     assert len(results_1d) == 1
     
@@ -114,4 +105,156 @@ def test_faiss_store_query_vector_shapes(temp_faiss_path, sample_doc):
     
     # Resultados devem ser idênticos
     assert results_1d[0].doc.id == results_2d[0].doc.id
-    assert abs(results_1d[0].score - results_2d[0].score) < 1e-6
\ No newline at end of file
+    assert math.isclose(results_1d[0].score, results_2d[0].score, abs_tol=1e-6)
+
+
+def test_faiss_store_get_docs_by_meta(temp_faiss_path):
+    """Testa filtro direto por substring em campo de meta."""
+    docs = [
+        Doc(id="proc_1", text="Habeas corpus", meta={"case_number": "144280533"}),
+        Doc(id="proc_2", text="Recurso especial", meta={"case_number": "563878"}),
+        Doc(id="proc_3", text="Agravo em execução"),
+    ]
+    vectors = np.eye(len(docs), config.EMBEDDING_DIM, dtype=np.float32)
+    store = FAISSStore(index_path=temp_faiss_path)
+    store.index(docs, vectors=vectors)
+    
+    matches = store.get_docs_by_meta("case_number", "280533")
+    assert [doc.id for doc in matches] == ["proc_1"]
+    
+    assert store.get_docs_by_meta("case_number", "999999") == []
+    assert store.get_docs_by_meta("campo_inexistente", "1") == []
+
+
+def test_faiss_store_ivf_index_type(temp_faiss_path, monkeypatch, encoder):
+    """Testa criação de índice IVF via index_factory (treino + nprobe)."""
+    import faiss
+    
+    docs = [
+        Doc(id=f"doc_{i}", text=f"Documento jurídico {i} sobre o tema {i % 7} e artigo {i % 11}")
+        for i in range(64)
+    ]
+    store = FAISSStore(index_path=temp_faiss_path, index_type="IVF4,Flat")
+    store.index(docs)
+    assert store.get_doc_count() == len(docs)
+    
+    ivf_index = faiss.try_extract_index_ivf(store._index)
+    assert ivf_index is not None
+    assert ivf_index.nprobe == 4
+    
+    query_vector = encoder.encode_single_text(docs[0].text)
+    results = store.search(query_vector, k=3)
+    assert results[0].doc.id == docs[0].id
+    
+    # Ao recarregar, nprobe é reaplicado a partir da configuração atual
+    store.save()
+    monkeypatch.setattr(config, "FAISS_NPROBE", 2)
+    reloaded = FAISSStore(index_path=temp_faiss_path, metadata_path=store.metadata_path)
+    assert faiss.try_extract_index_ivf(reloaded._index).nprobe == 2
+
+
+@pytest.mark.parametrize("index_type, esperado", [
+    ("SQfp16", "Flat"),
+    ("SQ8", "Flat"),
+    ("Flat", "Flat"),
+    ("IVF64,SQfp16", "IVF64,SQfp16"),
+])
+def test_faiss_store_index_type_gpu(temp_faiss_path, monkeypatch, index_type, esperado):
+    """Testa que, com GPU habilitada, SQ sem IVF (não clonável para GPU) vira Flat."""
+    from src.storage import faiss_store
+    
+    monkeypatch.setattr(config, "USE_FAISS_GPU", True)
+    monkeypatch.setattr(faiss_store, "_gpu_available", lambda: True)
+    store = FAISSStore(index_path=temp_faiss_path, index_type=index_type)
+    assert store.index_type == esperado
+    
+    # Sem GPU, o SQfp16 padrão é mantido
+    monkeypatch.setattr(config, "USE_FAISS_GPU", False)
+    assert faiss_store.resolve_index_type(index_type) == index_type
+
+
+def test_configure_faiss_threads(temp_faiss_path, monkeypatch):
+    """Testa configuração das threads OpenMP (global, fora do construtor do store)."""
+    import faiss
+    from src.storage.faiss_store import configure_faiss_threads
+    
+    original = faiss.omp_get_max_threads()
+    try:
+        monkeypatch.setattr(config, "FAISS_NUM_THREADS", 1)
+        assert configure_faiss_threads() == 1
+        assert faiss.omp_get_max_threads() == 1
+        
+        # Criar um store não reconfigura as threads do processo
+        monkeypatch.setattr(config, "FAISS_NUM_THREADS", 2)
+        FAISSStore(index_path=temp_faiss_path)
+        assert faiss.omp_get_max_threads() == 1
+    finally:
+        faiss.omp_set_num_threads(original)
+
+
+def test_faiss_store_index_with_precomputed_vectors(temp_faiss_path, dummy_docs, dummy_vectors):
+    """Testa indexação reaproveitando embeddings já calculados."""
+    store = FAISSStore(index_path=temp_faiss_path)
+    store.index(dummy_docs, vectors=dummy_vectors)
+    assert store.get_doc_count() == len(dummy_docs)
+    
+    results = store.search(dummy_vectors[0], k=1)
+    assert results[0].doc.id == dummy_docs[0].id
+    
+    with pytest.raises(ValueError):
+        store.index(dummy_docs, vectors=dummy_vectors[:2])
+
+
+def test_faiss_store_mmap_load(prebuilt_store, dummy_vectors, dummy_docs):
+    """Testa carregamento do índice salvo via mmap somente leitura."""
+    store = prebuilt_store
+    assert store.mmap
+    assert store.get_doc_count() == len(dummy_docs)
+    
+    results = store.search(dummy_vectors[0], k=1)
+    assert results[0].doc.id == dummy_docs[0].id
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="requer /proc (Linux)")
+@pytest.mark.parametrize("index_type", ["SQfp16", "Flat", "IVF4,Flat"])
+def test_faiss_store_mmap_mapeia_arquivo(temp_faiss_path, index_type):
+    """Testa que o índice carregado com mmap=True é de fato mapeado (Flat/SQ inclusive)."""
+    import faiss
+    
+    if not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        pytest.skip("FAISS sem IO_FLAG_MMAP_IFC: só listas IVF são mapeadas")
+    
+    docs = [Doc(id=f"doc_{i}", text=f"Documento {i}") for i in range(200)]
+    vectors = np.random.default_rng(0).random((len(docs), 32), dtype=np.float32)
+    metadata_path = os.path.join(temp_faiss_path, "metadata.parquet")
+    store = FAISSStore(index_path=temp_faiss_path, metadata_path=metadata_path, index_type=index_type)
+    store.index(docs, vectors=vectors)
+    store.save()
+    
+    loaded = FAISSStore(index_path=temp_faiss_path, metadata_path=metadata_path, mmap=True)
+    with open("/proc/self/maps") as f:
+        assert loaded._get_index_file() in f.read()
+    assert loaded.search(vectors[7], k=1)[0].doc.id == "doc_7"
+
+
+@pytest.mark.parametrize("index_type", ["SQfp16", "IVF4,Flat"])
+def test_faiss_store_mmap_somente_leitura(temp_faiss_path, index_type):
+    """Testa que indexar ou salvar um índice carregado via mmap falha com erro claro."""
+    docs = [Doc(id=f"doc_{i}", text=f"Documento {i}") for i in range(200)]
+    vectors = np.random.default_rng(0).random((len(docs), 32), dtype=np.float32)
+    metadata_path = os.path.join(temp_faiss_path, "metadata.parquet")
+    store = FAISSStore(index_path=temp_faiss_path, metadata_path=metadata_path, index_type=index_type)
+    store.index(docs, vectors=vectors)
+    store.save()
+    
+    loaded = FAISSStore(index_path=temp_faiss_path, metadata_path=metadata_path, mmap=True)
+    with pytest.raises(RuntimeError, match="somente leitura"):
+        loaded.index(docs[:1], vectors=vectors[:1])
+    with pytest.raises(RuntimeError, match="somente leitura"):
+        loaded.save()
+    assert loaded.get_doc_count() == len(docs)
+    
+    # Sem mmap, o mesmo índice continua aceitando novos documentos
+    writable = FAISSStore(index_path=temp_faiss_path, metadata_path=metadata_path, mmap=False)
+    writable.index([Doc(id="novo", text="novo")], vectors=vectors[:1])
+    assert writable.get_doc_count() == len(docs) + 1
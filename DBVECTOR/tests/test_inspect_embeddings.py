@@ -4,6 +4,7 @@ Testes para inspeção de embeddings.
 import pytest
 import json
 import numpy as np
+import faiss
 from pathlib import Path
 
 from src.eval.inspect_embeddings import (
@@ -14,12 +15,24 @@ from src.eval.inspect_embeddings import (
 )
 
 
-def test_inspect_embeddings_valid():
+@pytest.fixture(scope="session")
+def normalized_vecs_factory():
+    """Fixture que gera vetores aleatórios float32 normalizados (L2), com seed fixa."""
+    rng = np.random.default_rng(0)
+
+    def _make(n: int, d: int = 384) -> np.ndarray:
+        vectors = rng.standard_normal((n, d), dtype=np.float32)
+        # Normalização L2 in-place em um único passe (sem temporários (n, d))
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    return _make
+
+
+def test_inspect_embeddings_valid(normalized_vecs_factory):
     """Testa inspeção de embeddings válidos."""
     # Cria vetores válidos (10 docs, dim 384)
-    vectors = np.random.randn(10, 384).astype(np.float32)
-    # Normaliza
-    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = normalized_vecs_factory(10)
     
     report = inspect_embeddings(vectors)
     
@@ -60,10 +73,11 @@ def test_inspect_embeddings_with_inf():
     assert report["num_inf"] == 2
 
 
-def test_inspect_embeddings_collapsed():
+def test_inspect_embeddings_collapsed(normalized_vecs_factory):
     """Testa detecção de vetores colapsados."""
     # Vetores com norma muito baixa
-    vectors = np.random.randn(10, 384).astype(np.float32) * 0.01  # Norma ~ 0.01
+    vectors = normalized_vecs_factory(10)
+    vectors *= 0.01  # Norma = 0.01
     
     report = inspect_embeddings(vectors)
     
@@ -72,16 +86,13 @@ def test_inspect_embeddings_collapsed():
     assert report["collapsed_pct"] > 0
 
 
-def test_inspect_embeddings_near_duplicates():
+def test_inspect_embeddings_near_duplicates(normalized_vecs_factory):
     """Testa detecção de near-duplicates."""
-    vectors = np.random.randn(10, 384).astype(np.float32)
-    
-    # Normaliza
-    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = normalized_vecs_factory(10)
     
     # Cria duplicatas exatas
-    vectors[5] = vectors[0].copy()
-    vectors[6] = vectors[1].copy()
+    np.copyto(vectors[5], vectors[0])
+    np.copyto(vectors[6], vectors[1])
     
     report = inspect_embeddings(vectors, near_dupes_threshold=0.995)
     
@@ -101,11 +112,10 @@ def test_inspect_embeddings_dimension_mismatch():
     assert report["dimension_ok"] is False
 
 
-def test_inspect_embeddings_norms():
+def test_inspect_embeddings_norms(normalized_vecs_factory):
     """Testa cálculo de normas L2."""
     # Vetores com norma ~1.0
-    vectors = np.random.randn(100, 384).astype(np.float32)
-    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = normalized_vecs_factory(100)
     
     report = inspect_embeddings(vectors)
     
@@ -115,11 +125,10 @@ def test_inspect_embeddings_norms():
     assert 0.9 < report["norm_l2"]["p95"] < 1.1
 
 
-def test_inspect_embeddings_similarities():
+def test_inspect_embeddings_similarities(normalized_vecs_factory):
     """Testa cálculo de similaridades."""
     # Vetores aleatórios ortogonais
-    vectors = np.random.randn(100, 384).astype(np.float32)
-    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = normalized_vecs_factory(100)
     
     report = inspect_embeddings(vectors)
     
@@ -137,7 +146,8 @@ def test_load_embeddings_from_npy(tmp_path):
     loaded = load_embeddings_from_npy(npy_file)
     
     assert loaded.shape == vectors.shape
-    assert np.allclose(loaded, vectors)
+    # .npy preserva os bits: igualdade exata
+    assert np.array_equal(loaded, vectors)
 
 
 def test_load_embeddings_from_jsonl(tmp_path):
@@ -156,7 +166,8 @@ def test_load_embeddings_from_jsonl(tmp_path):
     loaded = load_embeddings_from_jsonl(jsonl_file)
     
     assert loaded.shape == (3, 3)
-    assert np.allclose(loaded, np.array(vectors))
+    # Round-trip JSON de decimais curtos é exato (comparado no mesmo dtype float32)
+    assert np.array_equal(loaded, np.array(vectors, dtype=loaded.dtype))
 
 
 def test_load_embeddings_from_jsonl_with_empty_lines(tmp_path):
@@ -200,35 +211,35 @@ def test_generate_embeddings_no_text_field(tmp_path):
         generate_embeddings_from_jsonl(jsonl_file)
 
 
-def test_inspect_embeddings_large_dataset():
+def test_inspect_embeddings_large_dataset(normalized_vecs_factory):
     """Testa inspeção com dataset grande (usa amostragem)."""
-    # Simula 2000 vetores
-    vectors = np.random.randn(2000, 384).astype(np.float32)
-    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Simula 1024 vetores (> 1000: ativa a amostragem)
+    vectors = normalized_vecs_factory(1024)
     
     report = inspect_embeddings(vectors)
     
-    assert report["num_vectors"] == 2000
+    assert report["num_vectors"] == 1024
     assert report["dimension"] == 384
     # Amostragem deve funcionar sem explodir memória
 
 
-def test_inspect_embeddings_threshold_variations():
+def test_inspect_embeddings_threshold_variations(normalized_vecs_factory):
     """Testa diferentes thresholds de near-duplicates."""
-    vectors = np.random.randn(50, 384).astype(np.float32)
-    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = normalized_vecs_factory(50)
     
     # Cria alguns duplicatas
-    vectors[10] = vectors[0].copy()
-    vectors[20] = vectors[5].copy()
+    np.copyto(vectors[10], vectors[0])
+    np.copyto(vectors[20], vectors[5])
     
-    # Threshold alto: deve detectar mais
-    report_high = inspect_embeddings(vectors, near_dupes_threshold=0.99)
+    # Threshold alto: deve detectar mais (uma única varredura, com os scores dos pares)
+    report_high = inspect_embeddings(vectors, near_dupes_threshold=0.99, return_pair_scores=True)
+    scores = report_high["near_duplicates"]["scores"]
+    assert len(scores) == report_high["near_duplicates"]["count"]
     
-    # Threshold muito alto: deve detectar menos
-    report_very_high = inspect_embeddings(vectors, near_dupes_threshold=0.999)
+    # Threshold muito alto: deve detectar menos (filtra os mesmos pares, sem recalcular)
+    count_very_high = sum(score >= 0.999 for score in scores)
     
-    assert report_high["near_duplicates"]["count"] >= report_very_high["near_duplicates"]["count"]
+    assert report_high["near_duplicates"]["count"] >= count_very_high >= 2
 
 
 def test_inspect_embeddings_report_structure():
@@ -259,10 +270,20 @@ def test_inspect_embeddings_report_structure():
     assert "threshold" in report["near_duplicates"]
 
 
-def test_inspect_embeddings_realistic_scenario():
-    """Testa cenário realista com embeddings de modelo real."""
-    from src import embeddings as emb
+def test_inspect_embeddings_realistic_scenario_fast(normalized_vecs_factory):
+    """Testa cenário realista com vetores normalizados sintéticos (sem modelo)."""
+    report = inspect_embeddings(normalized_vecs_factory(4))
     
+    assert report["dimension_ok"] is True
+    assert report["has_nan"] is False
+    assert report["has_inf"] is False
+    assert report["collapsed_vectors"] == 0
+    assert report["norm_l2"]["mean"] > 0.5
+
+
+@pytest.mark.slow
+def test_inspect_embeddings_realistic_scenario_model(encoder):
+    """Testa cenário realista com embeddings de modelo real (opt-in: -m slow)."""
     texts = [
         "Direitos fundamentais na Constituição",
         "Habeas corpus e liberdade",
@@ -270,7 +291,7 @@ def test_inspect_embeddings_realistic_scenario():
         "Responsabilidade do fornecedor"
     ]
     
-    vectors = emb.encode_texts(texts)
+    vectors = encoder.encode_texts(texts)
     
     report = inspect_embeddings(vectors)
     
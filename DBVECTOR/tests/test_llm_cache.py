@@ -0,0 +1,162 @@
+"""
+Testes para o cache LRU de respostas do LLM.
+"""
+import pytest
+
+from src.llm_cache import LLMResponseCache
+from src.rag_normalizer import LegalQueryNormalizer
+from src.rag_service import (
+    INSTRUCOES_RAG_SEEU,
+    INSTRUCOES_RAG_SEEU_MARKDOWN,
+    TEMPLATE_RAG_SEEU,
+    TEMPLATE_RAG_SEEU_MARKDOWN,
+    RagService,
+)
+
+
+def test_llm_cache_lru_eviction():
+    """Testa hit, miss e descarte do item menos recente."""
+    cache = LLMResponseCache(maxsize=2)
+    cache.put("a", "resposta a")
+    cache.put("b", "resposta b")
+
+    # Acessar "a" o torna o mais recente; "b" é descartado ao inserir "c"
+    assert cache.get("a") == "resposta a"
+    cache.put("c", "resposta c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "resposta a"
+    assert cache.get("c") == "resposta c"
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_llm_cache_key_depends_on_provider_model_and_prompt():
+    """Testa que a chave muda com provedor, modelo ou prompt."""
+    key = LLMResponseCache.make_key("openai", "gpt-4o-mini", "prompt")
+    assert key == LLMResponseCache.make_key("openai", "gpt-4o-mini", "prompt")
+    assert key != LLMResponseCache.make_key("anthropic", "gpt-4o-mini", "prompt")
+    assert key != LLMResponseCache.make_key("openai", "gpt-4o", "prompt")
+    assert key != LLMResponseCache.make_key("openai", "gpt-4o-mini", "prompt 2")
+
+
+def test_rag_service_llm_called_once_for_same_prompt(monkeypatch):
+    """Testa que prompts idênticos chamam o provedor uma única vez."""
+    service = RagService(store=None, provider="openai", api_key="sk-test", cache_size=8)
+
+    calls = []
+
+    def fake_provider(prompt, instrucoes=None):
+        calls.append(prompt)
+        return f"resposta para {prompt}"
+
+    monkeypatch.setattr(service, "_chamar_llm_provider", fake_provider)
+
+    assert service._chamar_llm("pergunta") == "resposta para pergunta"
+    assert service._chamar_llm("pergunta") == "resposta para pergunta"
+    assert service._chamar_llm("outra pergunta") == "resposta para outra pergunta"
+    assert calls == ["pergunta", "outra pergunta"]
+
+
+def test_rag_service_llm_cache_disabled(monkeypatch):
+    """Testa que cache_size=0 desativa o cache."""
+    service = RagService(store=None, provider="openai", api_key="sk-test", cache_size=0)
+
+    calls = []
+    monkeypatch.setattr(service, "_chamar_llm_provider", lambda prompt, instrucoes=None: calls.append(prompt) or "ok")
+
+    service._chamar_llm("pergunta")
+    service._chamar_llm("pergunta")
+    assert len(calls) == 2
+    assert len(service.llm_cache) == 0
+
+
+def test_rag_prompt_is_cache_friendly():
+    """Testa que as instruções fixas ficam fora do template e o template termina no campo variável."""
+    for instrucoes, template in (
+        (INSTRUCOES_RAG_SEEU, TEMPLATE_RAG_SEEU),
+        (INSTRUCOES_RAG_SEEU_MARKDOWN, TEMPLATE_RAG_SEEU_MARKDOWN),
+    ):
+        assert "{documentos_contexto}" not in instrucoes
+        assert "SUA TAREFA" in instrucoes
+        assert "SUA TAREFA" not in template
+        assert template.endswith("{documentos_contexto}")
+
+
+def test_rag_service_llm_cache_key_includes_instrucoes(monkeypatch):
+    """Testa que o mesmo prompt com instruções diferentes não reaproveita o cache."""
+    service = RagService(store=None, provider="openai", api_key="sk-test", cache_size=8)
+
+    calls = []
+    monkeypatch.setattr(
+        service, "_chamar_llm_provider",
+        lambda prompt, instrucoes=None: calls.append(instrucoes) or "ok"
+    )
+
+    service._chamar_llm("pergunta", instrucoes=INSTRUCOES_RAG_SEEU)
+    service._chamar_llm("pergunta", instrucoes=INSTRUCOES_RAG_SEEU_MARKDOWN)
+    service._chamar_llm("pergunta", instrucoes=INSTRUCOES_RAG_SEEU)
+    assert calls == [INSTRUCOES_RAG_SEEU, INSTRUCOES_RAG_SEEU_MARKDOWN]
+
+
+def test_llm_cache_nao_guarda_resposta_invalida():
+    """Testa que resposta reprovada pelo validador não entra no cache."""
+    cache = LLMResponseCache(maxsize=4)
+    respostas = iter(["{truncado", '{"ok": true}'])
+
+    def validar(resposta):
+        if not resposta.endswith("}"):
+            raise ValueError("JSON inválido")
+
+    with pytest.raises(ValueError):
+        cache.get_or_call("k", lambda: next(respostas), validar)
+    assert len(cache) == 0
+
+    assert cache.get_or_call("k", lambda: next(respostas), validar) == '{"ok": true}'
+    assert cache.get_or_call("k", lambda: "não chamado", validar) == '{"ok": true}'
+
+
+def test_rag_service_json_invalido_volta_ao_provedor(monkeypatch):
+    """Testa que JSON inválido do LLM não fica em cache: a repetição chama o provedor de novo."""
+    service = RagService(store=None, provider="openai", api_key="sk-test", cache_size=8)
+
+    respostas = iter(['{"teses": [', '{"teses": []}'])
+    calls = []
+
+    def fake_provider(prompt, instrucoes=None):
+        calls.append(prompt)
+        return next(respostas)
+
+    monkeypatch.setattr(service, "_chamar_llm_provider", fake_provider)
+
+    def gerar():
+        resposta = service._chamar_llm(
+            "pergunta", instrucoes=INSTRUCOES_RAG_SEEU, validar=service._parse_resposta_llm
+        )
+        return service._parse_resposta_llm(resposta)
+
+    with pytest.raises(ValueError):
+        gerar()
+    assert gerar() == {"teses": []}
+    assert gerar() == {"teses": []}
+    assert len(calls) == 2
+
+
+def test_normalizer_json_invalido_volta_ao_provedor(monkeypatch):
+    """Testa que o fallback por JSON inválido não fica preso no cache do normalizador."""
+    normalizer = LegalQueryNormalizer(provider="openai", api_key="sk-test", cache_size=8)
+    valido = (
+        '{"intencao": "consulta_jurisprudencia", "tipoBeneficioOuTema": "progressao", '
+        '"dadosExecucaoPenal": {}, "temaExecucao": [], "palavrasChaveJuridicas": [], '
+        '"queryRAG": "progressão de regime", "observacoes": ""}'
+    )
+    respostas = iter(["{truncado", valido])
+    calls = []
+    monkeypatch.setattr(
+        normalizer, "_chamar_llm_provider",
+        lambda prompt: calls.append(prompt) or next(respostas)
+    )
+
+    assert normalizer.normalizar("progressão").queryRAG == "progressão"  # fallback
+    assert normalizer.normalizar("progressão").queryRAG == "progressão de regime"
+    assert len(calls) == 2
@@ -2,15 +2,17 @@
 Testes para OpenSearch store.
 Estes testes são executados apenas se OpenSearch estiver disponível.
 """
+import functools
+import numpy as np
 import pytest
 import requests
-from opensearchpy import OpenSearch
 from opensearchpy.exceptions import ConnectionError
 
 from src import config
 from src.storage.opensearch_store import OpenSearchStore
 
 
+@functools.lru_cache(maxsize=1)
 def is_opensearch_available() -> bool:
     """Verifica se OpenSearch está disponível."""
     try:
@@ -26,34 +28,27 @@ def is_opensearch_available() -> bool:
 # Skip todos os testes se OpenSearch não estiver disponível
 pytestmark = pytest.mark.skipif(
     not is_opensearch_available(),
-    reason="OpenSearch não está disponível em localhost:9200"
+    reason=f"OpenSearch não está disponível em {config.OPENSEARCH_HOST}:{config.OPENSEARCH_PORT}"
 )
 
 
 @pytest.fixture
-def opensearch_store(opensearch_test_index):
-    """Fixture para store OpenSearch de teste."""
-    store = OpenSearchStore(index_name=opensearch_test_index)
+def opensearch_store(opensearch_client, opensearch_test_index):
+    """Fixture para store OpenSearch de teste (reaproveita o cliente da sessão)."""
+    store = OpenSearchStore(client=opensearch_client, index_name=opensearch_test_index)
     
     # Limpa índice se existir
-    try:
-        store.delete_index()
-    except:
-        pass
+    opensearch_client.indices.delete(index=opensearch_test_index, ignore=[404])
     
     yield store
     
     # Cleanup após teste
-    try:
-        store.delete_index()
-    except:
-        pass
+    opensearch_client.indices.delete(index=opensearch_test_index, ignore=[404])
 
 
-def test_opensearch_connection():
+def test_opensearch_connection(opensearch_client):
     """Testa conexão com OpenSearch."""
-    client = OpenSearch(**config.get_opensearch_config())
-    info = client.info()
+    info = opensearch_client.info()
     assert "version" in info
     assert "number" in info["version"]
 
@@ -85,17 +80,18 @@ def test_opensearch_ensure_index(opensearch_store):
     assert properties["vector"]["dimension"] == 384
 
 
-def test_opensearch_index_and_search(opensearch_store, dummy_docs):
-    """Testa indexação e busca no OpenSearch."""
+def test_opensearch_index_and_search(
+    opensearch_store, dummy_docs, dummy_vectors, precomputed_queries
+):
+    """Testa indexação (um _bulk, embeddings pré-calculados) e busca no OpenSearch."""
     # Indexa documentos
-    opensearch_store.index(dummy_docs)
+    opensearch_store.index(dummy_docs, vectors=dummy_vectors)
     
     # Verifica contagem
     assert opensearch_store.get_doc_count() == len(dummy_docs)
     
     # Testa busca
-    from src import embeddings
-    query_vector = embeddings.encode_single_text("direitos fundamentais")
+    query_vector = precomputed_queries["direitos fundamentais"]
     results = opensearch_store.search(query_vector, k=3)
     
     assert len(results) > 0
@@ -110,23 +106,22 @@ def test_opensearch_index_and_search(opensearch_store, dummy_docs):
         assert result.doc.id in [doc.id for doc in dummy_docs]
 
 
-def test_opensearch_search_empty_index(opensearch_store):
+def test_opensearch_search_empty_index(opensearch_store, precomputed_queries):
     """Testa busca em índice vazio."""
     # Garante que índice existe mas está vazio
     opensearch_store.ensure_index()
     assert opensearch_store.get_doc_count() == 0
     
-    from src import embeddings
-    query_vector = embeddings.encode_single_text("qualquer query")
+    query_vector = precomputed_queries["qualquer query"]
     results = opensearch_store.search(query_vector, k=5)
     
     assert results == []
 
 
-def test_opensearch_delete_index(opensearch_store, sample_doc):
+def test_opensearch_delete_index(opensearch_store, sample_doc, sample_doc_vectors):
     """Testa remoção de índice."""
     # Cria índice e indexa documento
-    opensearch_store.index([sample_doc])
+    opensearch_store.index([sample_doc], vectors=sample_doc_vectors)
     assert opensearch_store.get_doc_count() == 1
     
     # Remove índice
@@ -137,14 +132,14 @@ def test_opensearch_delete_index(opensearch_store, sample_doc):
     assert opensearch_store.get_doc_count() == 0
 
 
-def test_opensearch_search_relevance(opensearch_store, dummy_docs):
+def test_opensearch_search_relevance(
+    opensearch_store, dummy_docs, dummy_vectors, precomputed_queries
+):
     """Testa relevância dos resultados de busca."""
-    opensearch_store.index(dummy_docs)
-    
-    from src import embeddings
+    opensearch_store.index(dummy_docs, vectors=dummy_vectors)
     
     # Query específica para direitos constitucionais
-    query_vector = embeddings.encode_single_text("direitos fundamentais constituição")
+    query_vector = precomputed_queries["direitos fundamentais constituição"]
     results = opensearch_store.search(query_vector, k=5)
     
     assert len(results) > 0
@@ -154,4 +149,78 @@ def test_opensearch_search_relevance(opensearch_store, dummy_docs):
     assert scores == sorted(scores, reverse=True)
     
     # Primeiro resultado deve ter score maior que 0
-    assert results[0].score > 0
\ No newline at end of file
+    assert results[0].score > 0
+
+    # Busca em lote (_msearch) deve reproduzir as buscas individuais
+    queries = [
+        "direitos fundamentais constituição",
+        "direitos fundamentais",
+        "documento sobre direito penal",
+    ]
+    query_vectors = np.stack([precomputed_queries[q] for q in queries])
+    batch_results = opensearch_store.search_batch(query_vectors, k=5)
+    
+    assert len(batch_results) == len(queries)
+    assert [r.doc.id for r in batch_results[0]] == [r.doc.id for r in results]
+    for query, query_results in zip(queries, batch_results):
+        single = opensearch_store.search(precomputed_queries[query], k=5)
+        assert [r.doc.id for r in query_results] == [r.doc.id for r in single]
+
+
+def test_opensearch_ensure_index_fp16(opensearch_store, monkeypatch, dummy_docs, dummy_vectors):
+    """Testa criação de índice com vetores float16 (engine faiss + encoder SQfp16)."""
+    monkeypatch.setattr(config, "OPENSEARCH_VECTOR_FP16", True)
+    
+    # Cluster anterior a 2.13 não tem o encoder: falha com mensagem clara
+    cluster_version = opensearch_store.version
+    opensearch_store.version = "2.11.0"
+    with pytest.raises(ValueError, match="2.13"):
+        opensearch_store.ensure_index(dimension=384)
+    assert not opensearch_store.client.indices.exists(index=opensearch_store.index_name)
+    opensearch_store.version = cluster_version
+    
+    opensearch_store.ensure_index(dimension=dummy_vectors.shape[1])
+    mapping = opensearch_store.client.indices.get_mapping(index=opensearch_store.index_name)
+    method = mapping[opensearch_store.index_name]["mappings"]["properties"]["vector"]["method"]
+    assert method["engine"] == "faiss"
+    assert method["parameters"]["encoder"]["parameters"]["type"] == "fp16"
+    
+    opensearch_store.index(dummy_docs, vectors=dummy_vectors)
+    results = opensearch_store.search(dummy_vectors[0], k=1)
+    assert results[0].doc.id == dummy_docs[0].id
+    fp16_scores = {r.doc.id: r.score for r in opensearch_store.search(dummy_vectors[0], k=5)}
+    
+    # Flag desligada contra o índice fp16 existente: score continua convertido
+    monkeypatch.setattr(config, "OPENSEARCH_VECTOR_FP16", False)
+    scores = {r.doc.id: r.score for r in opensearch_store.search(dummy_vectors[0], k=5)}
+    assert scores == pytest.approx(fp16_scores)
+    
+    # Scores do índice fp16 ficam na mesma escala [0,1] do índice padrão
+    opensearch_store.delete_index()
+    opensearch_store.ensure_index(dimension=dummy_vectors.shape[1])
+    opensearch_store.index(dummy_docs, vectors=dummy_vectors)
+    default_scores = {r.doc.id: r.score for r in opensearch_store.search(dummy_vectors[0], k=5)}
+    assert fp16_scores.keys() == default_scores.keys()
+    for doc_id, score in default_scores.items():
+        assert fp16_scores[doc_id] == pytest.approx(score, abs=1e-2)
+
+
+def test_opensearch_fp16_flag_em_indice_existente(
+    opensearch_store, opensearch_client, monkeypatch, dummy_docs, dummy_vectors
+):
+    """Testa que o score segue o índice existente, não OPENSEARCH_VECTOR_FP16."""
+    monkeypatch.setattr(config, "OPENSEARCH_VECTOR_FP16", False)
+    opensearch_store.ensure_index(dimension=dummy_vectors.shape[1])
+    opensearch_store.index(dummy_docs, vectors=dummy_vectors)
+    default_scores = {r.doc.id: r.score for r in opensearch_store.search(dummy_vectors[0], k=5)}
+    
+    # Flag ligada contra o índice nmslib/cosinesimil já criado: mesma escala,
+    # tanto no store que criou o índice quanto em um novo (leitura lazy)
+    monkeypatch.setattr(config, "OPENSEARCH_VECTOR_FP16", True)
+    novo_store = OpenSearchStore(client=opensearch_client, index_name=opensearch_store.index_name)
+    for store in (opensearch_store, novo_store):
+        scores = {r.doc.id: r.score for r in store.search(dummy_vectors[0], k=5)}
+        assert scores.keys() == default_scores.keys()
+        for doc_id, score in default_scores.items():
+            assert 0 <= scores[doc_id] <= 1
+            assert scores[doc_id] == pytest.approx(score)
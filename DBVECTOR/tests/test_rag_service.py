@@ -0,0 +1,80 @@
+"""
+Testes para o serviço RAG (sem chamadas reais ao LLM).
+"""
+import pytest
+
+from src import rag_service
+from src.rag_normalizer import LegalQueryNormalizer
+from src.rag_schemas import RagQueryRequest
+from src.rag_service import RagService
+
+
+def _falhar(*args, **kwargs):
+    raise AssertionError("não deveria ser chamado para consulta vazia")
+
+
+@pytest.fixture
+def service_sem_llm(monkeypatch):
+    """RagService cujo LLM, normalizador e busca falham se forem chamados."""
+    normalizer = LegalQueryNormalizer(provider="openai", api_key="sk-test")
+    monkeypatch.setattr(normalizer, "_chamar_llm_provider", _falhar)
+    monkeypatch.setattr(rag_service, "get_normalizer", lambda: normalizer)
+
+    service = RagService(store=None, provider="openai", api_key="sk-test")
+    monkeypatch.setattr(service, "_chamar_llm_provider", _falhar)
+    monkeypatch.setattr(service, "_buscar_chunks", _falhar)
+    return service
+
+
+@pytest.mark.parametrize("prompt", [" ", "  \n\t "])
+@pytest.mark.parametrize("use_rag", [True, False])
+def test_processar_consulta_vazia_sem_llm(service_sem_llm, monkeypatch, prompt, use_rag):
+    """Testa que consulta só com espaços retorna resposta vazia sem normalizar, buscar nem LLM."""
+    monkeypatch.setattr(rag_service, "get_normalizer", _falhar)
+
+    resposta = service_sem_llm.processar_consulta(
+        RagQueryRequest(promptUsuario=prompt, useRag=use_rag)
+    )
+
+    assert resposta.totalChunksRecuperados == 0
+    assert resposta.teses == []
+    assert resposta.queryNormalizada.intencao == "consulta_vazia"
+
+
+def test_query_markdown_vazia_sem_llm(service_sem_llm, monkeypatch, tmp_path):
+    """Testa que query_markdown com consulta em branco não normaliza, loga nem chama o LLM."""
+    monkeypatch.setattr("src.request_logger.LOGS_DIR", tmp_path)
+    monkeypatch.setattr(rag_service, "get_normalizer", _falhar)
+
+    resposta = service_sem_llm.query_markdown(RagQueryRequest(promptUsuario="   "))
+
+    assert "Nenhum documento" in resposta
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parse_resposta_llm_json(service_sem_llm):
+    """Testa parse da resposta JSON do LLM (com fences) e erro para JSON inválido."""
+    resposta = service_sem_llm._parse_resposta_llm('```json\n{"teses": [], "contexto_seeu": "ação"}\n```')
+    assert resposta == {"teses": [], "contexto_seeu": "ação"}
+
+    with pytest.raises(ValueError):
+        service_sem_llm._parse_resposta_llm("não é JSON")
+
+
+def test_resposta_markdown_inclui_historico(service_sem_llm, monkeypatch):
+    """Testa que o histórico (truncado) entra no prompt após as instruções fixas."""
+    prompts = []
+    monkeypatch.setattr(
+        service_sem_llm, "_chamar_llm",
+        lambda prompt, instrucoes=None: prompts.append(prompt) or "ok"
+    )
+    normalizada = rag_service.get_normalizer()._fallback_normalizacao("pergunta")
+    history = [
+        {"role": "user", "content": "primeira"},
+        {"role": "assistant", "content": "x" * 600},
+    ]
+
+    service_sem_llm._gerar_resposta_markdown_llm("pergunta", normalizada, {}, history=history)
+
+    assert "**HISTÓRICO DA CONVERSA:**\n- **Usuário:** primeira\n" in prompts[0]
+    assert f"- **Assistente:** {'x' * 500}...\n\n" in prompts[0]
@@ -9,7 +9,8 @@ from src.eval.retrieval_eval import (
     recall_at_k,
     mean_reciprocal_rank,
     dcg_at_k,
-    ndcg_at_k
+    ndcg_at_k,
+    _IDCG,
 )
 
 
@@ -144,6 +145,10 @@ def test_ndcg_at_k():
     expected_ndcg = actual_dcg / ideal_dcg
     
     assert ndcg_at_k(retrieved, relevant, 3) == pytest.approx(expected_ndcg, abs=0.01)
+    
+    # IDCG vem da tabela acumulada (n = min(|relevantes|, k) = 2)
+    assert ndcg_at_k(retrieved, relevant, 3) == actual_dcg / _IDCG[1]
+    assert _IDCG[1] == ideal_dcg
 
 
 def test_ndcg_at_k_perfect():
@@ -224,3 +229,16 @@ def test_real_world_scenario():
     assert r5 == 0.75  # 3/4
     assert mrr == 1.0  # Primeiro é relevante
     assert 0.8 < ndcg5 <= 1.0  # Boa ordenação mas não perfeita
+
+
+def test_metrics_accept_set_relevant():
+    """Testa que as métricas aceitam relevantes como set (mesmo resultado que lista)."""
+    retrieved = ["doc3", "doc1", "doc7", "doc5", "doc2"]
+    relevant = ["doc1", "doc5", "doc9"]
+    
+    for k in (1, 3, 5, 10):
+        assert precision_at_k(retrieved, set(relevant), k) == precision_at_k(retrieved, relevant, k)
+        assert recall_at_k(retrieved, frozenset(relevant), k) == recall_at_k(retrieved, relevant, k)
+        assert dcg_at_k(retrieved, set(relevant), k) == dcg_at_k(retrieved, relevant, k)
+        assert ndcg_at_k(retrieved, set(relevant), k) == ndcg_at_k(retrieved, relevant, k)
+    assert mean_reciprocal_rank(retrieved, set(relevant)) == 0.5
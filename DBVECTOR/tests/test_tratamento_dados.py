@@ -5,9 +5,11 @@ Testa varredura recursiva, filtragem de cluster_name == "unknown",
 deduplicação, e processamento de arquivos .json e .jsonl.
 """
 
+import io
 import json
 import pytest
 from pathlib import Path
+from src.tools import tratamento_dados
 from src.tools.tratamento_dados import DataProcessor, main
 import sys
 from unittest.mock import patch
@@ -457,6 +459,266 @@ class TestDataProcessor:
 
         assert len(output_records) == 3
 
+    def test_iter_lines_entre_blocos(self, monkeypatch):
+        """
+        Testa leitura em blocos (fallback sem mmap): linhas que atravessam a
+        fronteira de um bloco devem ser reconstituídas corretamente.
+        """
+        monkeypatch.setattr(tratamento_dados, "_READ_BLOCK_SIZE", 16)
+
+        lines = [f"linha {i} ".encode() * i for i in range(1, 8)]
+        # BytesIO não tem fileno: força o caminho em blocos; última linha sem '\n'
+        stream = io.BytesIO(b"\n".join(lines))
+
+        assert list(tratamento_dados._iter_lines(stream)) == lines
+
+    def test_jsonl_ultima_linha_sem_quebra(self, tmp_path):
+        """Testa leitura via mmap com última linha sem '\n' final."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+
+        jsonl_file = input_dir / "data.jsonl"
+        records = [
+            {"id": str(i), "texto": "ação penal " * i, "cluster_name": "Penal"}
+            for i in range(1, 8)
+        ]
+        # Última linha sem '\n' final
+        jsonl_file.write_text(
+            "\n".join(json.dumps(r, ensure_ascii=False) for r in records), encoding="utf-8"
+        )
+
+        output_file = tmp_path / "output.jsonl"
+        processor = DataProcessor(
+            input_dir=input_dir,
+            output_file=output_file,
+            dedupe_by="none",
+            quiet=True,
+        )
+
+        assert processor.process() == 0
+
+        with open(output_file, "r", encoding="utf-8") as f:
+            output_records = [json.loads(line) for line in f]
+
+        assert [r["id"] for r in output_records] == [r["id"] for r in records]
+        assert processor.stats["invalid_records"] == 0
+
+    def test_jsonl_linhas_em_branco(self, tmp_path):
+        """Testa linhas vazias, só com espaços e com CRLF no .jsonl."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "data.jsonl").write_bytes(
+            b'{"id": "1", "texto": "a"}\r\n'
+            b"\n"
+            b" \t \r\n"
+            b'  {"id": "2", "texto": "b"}  \n'
+            b"\r\n"
+        )
+
+        output_file = tmp_path / "output.jsonl"
+        processor = DataProcessor(input_dir=input_dir, output_file=output_file, quiet=True)
+        assert processor.process() == 0
+
+        with open(output_file, "r", encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == ["1", "2"]
+        assert processor.stats["invalid_records"] == 0
+
+    @pytest.mark.parametrize("ext, stream", [(".json", False), (".json", True), (".jsonl", False)])
+    def test_inteiro_grande_e_nan_preservados(self, tmp_path, monkeypatch, ext, stream):
+        """
+        Testa que inteiros acima de 64 bits não viram float (nem colidem na
+        dedupe) e que NaN/Infinity continuam aceitos, como no json da stdlib.
+        """
+        if stream:
+            monkeypatch.setattr(tratamento_dados, "_STREAM_JSON_MIN_BYTES", 0)
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        lines = [
+            '{"id": 123456789012345678901234567890, "texto": "a"}',
+            '{"id": 123456789012345678901234567891, "texto": "b"}',
+            '{"id": -9223372036854775809, "texto": "c"}',
+            '{"id": "4", "score": NaN, "peso": -Infinity}',
+        ]
+        content = "\n".join(lines) if ext == ".jsonl" else "[" + ",\n".join(lines) + "]"
+        (input_dir / f"data{ext}").write_text(content, encoding="utf-8")
+
+        output_file = tmp_path / "output.jsonl"
+        processor = DataProcessor(input_dir=input_dir, output_file=output_file, quiet=True)
+        assert processor.process() == 0
+
+        output_lines = output_file.read_text(encoding="utf-8").splitlines()
+        output_records = [json.loads(line) for line in output_lines]
+
+        assert [r["id"] for r in output_records] == [
+            123456789012345678901234567890,
+            123456789012345678901234567891,
+            -9223372036854775809,
+            "4",
+        ]
+        assert processor.stats["duplicates_removed"] == 0
+        assert processor.stats["invalid_records"] == 0
+        assert '"score": NaN' in output_lines[3]
+        assert '"peso": -Infinity' in output_lines[3]
+
+    @pytest.mark.parametrize("parser", ["padrao", "ijson"])
+    def test_json_lista_parser(self, tmp_path, monkeypatch, parser):
+        """Testa que o streaming com ijson e o parse do arquivo inteiro geram a mesma saída."""
+        if parser == "ijson" and tratamento_dados.ijson is None:
+            pytest.skip("ijson não instalado")
+        if parser == "ijson":
+            monkeypatch.setattr(tratamento_dados, "_STREAM_JSON_MIN_BYTES", 0)
+
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        records = [
+            {"id": "1", "texto": "a", "cluster_name": "UNKNOWN"},
+            {"id": "2", "texto": "b", "cluster_name": "Civil", "meta": {"tags": ["x", "y"]}},
+            {"id": "2", "texto": "c", "cluster_name": "Civil"},
+            ["nao", "objeto"],
+        ]
+        (input_dir / "data.json").write_text(json.dumps(records), encoding="utf-8")
+        (input_dir / "extra.json").write_text(json.dumps({"id": "3", "texto": "d"}), encoding="utf-8")
+
+        output_file = tmp_path / "output.jsonl"
+        processor = DataProcessor(input_dir=input_dir, output_file=output_file, quiet=True)
+
+        assert processor.process() == 0
+
+        with open(output_file, "r", encoding="utf-8") as f:
+            output_records = [json.loads(line) for line in f]
+
+        assert output_records == [records[1], {"id": "3", "texto": "d"}]
+        assert processor.stats["records_read"] == 5
+        assert processor.stats["filtered_unknown"] == 1
+        assert processor.stats["duplicates_removed"] == 1
+        assert processor.stats["invalid_records"] == 1
+
+    @pytest.mark.parametrize("parser", ["padrao", "ijson"])
+    def test_json_malformado_nao_interrompe(self, tmp_path, monkeypatch, parser):
+        """
+        Testa que um .json malformado é descartado por inteiro (mesmo em
+        streaming, nenhum registro antes do erro é escrito) sem afetar os
+        demais arquivos.
+        """
+        if parser == "ijson":
+            if tratamento_dados.ijson is None:
+                pytest.skip("ijson não instalado")
+            monkeypatch.setattr(tratamento_dados, "_STREAM_JSON_MIN_BYTES", 0)
+
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "a.json").write_text('[{"id": "1", "texto": "a"}, {"id": ', encoding="utf-8")
+        (input_dir / "b.json").write_text('[{"id": "2", "texto": "b"}]', encoding="utf-8")
+
+        output_file = tmp_path / "output.jsonl"
+        processor = DataProcessor(input_dir=input_dir, output_file=output_file, quiet=True)
+        assert processor.process() == 0
+
+        with open(output_file, "r", encoding="utf-8") as f:
+            assert [json.loads(line)["id"] for line in f] == ["2"]
+        assert processor.stats["records_read"] == 1
+
+    def test_varredura_scandir(self, tmp_path):
+        """
+        Testa a varredura: ocultos são podados abaixo da raiz (não na própria
+        raiz) e diretórios via symlink não são seguidos.
+        """
+        input_dir = tmp_path / ".cache" / "input"
+        (input_dir / "sub" / ".oculto").mkdir(parents=True)
+        (input_dir / "sub" / "a.json").write_text("[]")
+        (input_dir / "sub" / "notas.txt").write_text("")
+        (input_dir / "sub" / ".oculto" / "b.json").write_text("[]")
+        (input_dir / "c.jsonl").write_text("")
+        (input_dir / "atalho").symlink_to(input_dir / "sub", target_is_directory=True)
+
+        processor = DataProcessor(input_dir=input_dir, output_file=tmp_path / "out.jsonl")
+
+        assert processor.find_eligible_files() == [
+            input_dir / "c.jsonl",
+            input_dir / "sub" / "a.json",
+        ]
+        assert processor.stats["files_scanned"] == 2
+
+    def test_workers_paralelo_igual_sequencial(self, tmp_path):
+        """Testa que o processamento paralelo gera a mesma saída e estatísticas."""
+        input_dir = tmp_path / "input"
+        (input_dir / "sub").mkdir(parents=True)
+        for i in range(4):
+            records = [
+                {"id": str(j), "texto": f"<b>doc</b> {i}-{j}", "cluster_name": "Civil"}
+                for j in range(i, i + 5)
+            ]
+            records.append({"id": f"u{i}", "texto": "x", "cluster_name": "unknown"})
+            (input_dir / f"data{i}.json").write_text(json.dumps(records), encoding="utf-8")
+            (input_dir / "sub" / f"data{i}.jsonl").write_text(
+                "\n".join(json.dumps(r) for r in records) + "\n{invalido\n", encoding="utf-8"
+            )
+
+        outputs = {}
+        stats = {}
+        for workers in (1, 2):
+            output_file = tmp_path / f"output_{workers}.jsonl"
+            processor = DataProcessor(
+                input_dir=input_dir, output_file=output_file, quiet=True, workers=workers
+            )
+            assert processor.process() == 0
+            outputs[workers] = output_file.read_bytes()
+            stats[workers] = processor.stats
+
+        assert outputs[1] == outputs[2]
+        assert stats[1] == stats[2]
+        assert stats[2]["duplicates_removed"] > 0
+        # Shards temporários dos workers são removidos ao final
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "input", "output_1.jsonl", "output_2.jsonl"
+        ]
+
+    def test_incremental_pula_entradas_inalteradas(self, tmp_path):
+        """Testa o modo incremental: reaproveita a saída só se nada mudou."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        data_file = input_dir / "data.jsonl"
+        data_file.write_text(json.dumps({"id": "1", "texto": "a"}) + "\n", encoding="utf-8")
+        # Saída dentro do diretório de entrada não pode ser reingerida
+        output_file = input_dir / "merged.jsonl"
+
+        def run():
+            processor = DataProcessor(
+                input_dir=input_dir, output_file=output_file, quiet=True, incremental=True
+            )
+            assert processor.process() == 0
+            return processor.stats
+
+        first = run()
+        assert first["records_written"] == 1
+        assert first["files_unchanged"] == 0
+
+        second = run()
+        assert second["files_unchanged"] == 1
+        assert second["records_read"] == 0
+        assert output_file.read_text(encoding="utf-8").count("\n") == 1
+
+        data_file.write_text(
+            json.dumps({"id": "1", "texto": "a"}) + "\n"
+            + json.dumps({"id": "2", "texto": "b"}) + "\n",
+            encoding="utf-8",
+        )
+        third = run()
+        assert third["files_unchanged"] == 0
+        assert third["records_written"] == 2
+        assert output_file.read_text(encoding="utf-8").count("\n") == 2
+
+    def test_is_unknown_cluster_valores(self, tmp_path):
+        """Testa o filtro de "unknown" com tamanhos próximos e valores não-string."""
+        processor = DataProcessor(input_dir=tmp_path, output_file=tmp_path / "out.jsonl", quiet=True)
+
+        for value in ("unknown", "UnKnOwN", "\tunknown\n", "   UNKNOWN   "):
+            assert processor.is_unknown_cluster({"cluster_name": value})
+        for value in ("unknow", "unknownn", " unknown x", "", 7, ["unknown"]):
+            assert not processor.is_unknown_cluster({"cluster_name": value})
+        # Valor válido em um campo não impede "unknown" em outro
+        assert processor.is_unknown_cluster({"cluster_name": "penal", "cluster": "Unknown"})
+
 
 class TestCLI:
     """Testes para a interface de linha de comando."""
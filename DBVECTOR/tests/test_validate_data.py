@@ -42,6 +42,11 @@ def test_check_text_too_short():
     # Texto com espaços (deve ser stripped)
     text_with_spaces = "   abc   "
     assert check_text_too_short(text_with_spaces, 10)
+    
+    # Espaços nas pontas não contam para o mínimo
+    assert check_text_too_short(" " * 300 + "a" * 199, 200)
+    assert check_text_too_short("a" * 199 + "\n" * 300, 200)
+    assert not check_text_too_short("\t" + "a" * 200 + " ", 200)
 
 
 def test_check_bad_tokens():
@@ -167,7 +172,32 @@ def test_validate_dataset_duplicate_ids():
     
     assert report["total"] == 3
     assert report["dupe_ids"] == 1
-    assert report["bad_overall_pct"] > 0
+    assert report["bad_overall_pct"] == 66.67  # os 2 docs do ID duplicado
+
+
+def test_validate_dataset_duplicate_ids_numeric_and_text():
+    """Testa duplicatas com IDs numéricos (np.unique) e não numéricos (Counter)."""
+    ok = "a" * 300
+    numeric = [
+        {"case_number": "10", "content": ok},
+        {"case_number": "10", "content": ok},
+        {"case_number": "20", "content": ok},
+        {"id": "", "content": ok},  # sem ID
+    ]
+    report = validate_dataset(numeric, min_chars=200, required_fields=["content"])
+    assert report["dupe_ids"] == 1
+    assert report["bad_overall_pct"] == 50.0
+    
+    # "0123" e "123" são IDs distintos (não viram o mesmo inteiro)
+    mixed = [
+        {"case_number": "0123", "content": ok},
+        {"case_number": "123", "content": ok},
+        {"case_number": "stj_1", "content": ok},
+        {"case_number": "stj_1", "content": ok},
+    ]
+    report = validate_dataset(mixed, min_chars=200)
+    assert report["dupe_ids"] == 1
+    assert report["bad_overall_pct"] == 50.0
 
 
 def test_validate_dataset_multiple_problems():